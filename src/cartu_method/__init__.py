@@ -8,15 +8,29 @@ and vector database persistence.
 __version__ = "0.1.0"
 
 from .rescue import MemoryRescue
-from .extractors import FactExtractor, DecisionExtractor, SkillExtractor
-from .backends import QdrantBackend, ChromaBackend, PineconeBackend
+from .extractors import FactExtractor, DecisionExtractor, SkillExtractor, CombinedExtractor, HedgedExtractor
+from .backends import QdrantBackend, ChromaBackend, PineconeBackend, LocalBackend
+from .embeddings import EmbeddingCache, LocalEmbedder, OpenAIEmbedder
+from .dedup import BloomDedupIndex
+from .lexical import BM25Index
+from .ratelimit import RateLimiter, configure_rate_limit
 
 __all__ = [
     "MemoryRescue",
     "FactExtractor",
     "DecisionExtractor", 
     "SkillExtractor",
+    "CombinedExtractor",
+    "HedgedExtractor",
     "QdrantBackend",
     "ChromaBackend",
     "PineconeBackend",
+    "LocalBackend",
+    "EmbeddingCache",
+    "OpenAIEmbedder",
+    "LocalEmbedder",
+    "BloomDedupIndex",
+    "BM25Index",
+    "RateLimiter",
+    "configure_rate_limit",
 ]
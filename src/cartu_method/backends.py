@@ -2,17 +2,47 @@
 Vector database backends for storing rescued memories.
 """
 
-import hashlib
-import json
+import asyncio
 import os
 import uuid
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
+from .dedup import BloomDedupIndex, RecentHashes
+from .embeddings import Embedder, EmbeddingCache, OpenAIEmbedder
+from .filters import matches, to_chroma, to_pinecone, to_qdrant, to_timestamp
+from .lexical import BM25Index, is_exact_token, reciprocal_rank_fusion, tokenize
 from .rescue import Memory
 
+if TYPE_CHECKING:
+    import httpx
+
 
 class QdrantBackend:
-    """Qdrant vector database backend with hybrid search."""
+    """
+    Qdrant vector database backend with hybrid search.
+
+    With ``hybrid`` (the default), committed memories are also added to a
+    local BM25 index and ``search`` fuses lexical and vector rankings with
+    reciprocal-rank fusion. Queries made of exact values (ports, IPs,
+    paths) that the lexical index fully answers skip the embedding call.
+
+    Fusion only starts once the index covers the whole collection:
+    immediately for a collection this backend creates, after
+    ``warm_lexical_index()`` for an existing one. Until then searches are
+    vector-only and nothing is indexed. Give ``lexical_index_path`` so a
+    warmed index survives restarts.
+
+    ``quantization`` ("int8" or "binary") is part of the schema of newly
+    created collections; an existing collection without quantization has
+    it added on startup (Qdrant builds the codes in the background).
+    Existing quantization settings are left as they are.
+
+    The async methods share one pooled connection per event loop; close it
+    with ``aclose()``.
+    """
+
+    QUANTIZATIONS = ("int8", "binary")
 
     def __init__(
         self,
@@ -21,45 +51,409 @@ class QdrantBackend:
         api_key: Optional[str] = None,
         embedding_model: str = "text-embedding-3-small",
         embedding_api_key: Optional[str] = None,
+        embed_batch_size: int = 2048,
+        upsert_batch_size: int = 256,
+        max_concurrency: int = 4,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        embedder: Optional[Embedder] = None,
+        dedup_index_path: Optional[str] = None,
+        dedup_index_capacity: int = 2_000_000,
+        seen_cache_size: int = 100_000,
+        quantization: Optional[str] = None,
+        oversampling: float = 2.0,
+        hybrid: bool = True,
+        lexical_index_path: Optional[str] = None,
+        rrf_k: int = 60,
+        fusion_candidates: int = 4,
     ):
+        if quantization is not None and quantization not in self.QUANTIZATIONS:
+            raise ValueError(f"quantization must be 'int8' or 'binary', got {quantization!r}")
         self.url = url.rstrip("/")
         self.collection = collection
         self.api_key = api_key
-        self.embedding_model = embedding_model
-        self.embedding_api_key = embedding_api_key or os.environ.get("OPENAI_API_KEY", "")
-        self._seen_hashes: set = set()
+        self.embedder = embedder or OpenAIEmbedder(
+            model=embedding_model,
+            api_key=embedding_api_key,
+            batch_size=embed_batch_size,
+        )
+        self.embedding_model = self.embedder.model
+        self.upsert_batch_size = upsert_batch_size
+        self.max_concurrency = max_concurrency
+        self.quantization = quantization
+        self.oversampling = oversampling
+        self.embedding_cache = embedding_cache or EmbeddingCache()
+        self._seen_hashes = RecentHashes(seen_cache_size)
+        # Optional on-disk Bloom filter: lets deduplicate() answer "new"
+        # locally once warmed (see warm_dedup_index)
+        self.dedup_index = (
+            BloomDedupIndex(dedup_index_path, capacity=dedup_index_capacity)
+            if dedup_index_path else None
+        )
+        # Local BM25 index for the lexical half of hybrid search; like the
+        # Bloom filter it is only authoritative once complete (warm_lexical_index)
+        self.lexical = BM25Index(lexical_index_path) if hybrid else None
+        self.rrf_k = rrf_k
+        self.fusion_candidates = fusion_candidates
+        self.lexical_only_searches = 0
+        self._warming_lexical = False
+        # Pooled client for the async methods, tied to the loop it was made on
+        self._async_client: Optional["httpx.AsyncClient"] = None
+        self._async_client_loop: Optional[asyncio.AbstractEventLoop] = None
         self._ensure_collection()
 
+    # Payload fields used by dedup lookups and search filters
+    PAYLOAD_INDEXES = {
+        "commit_hash": "keyword",
+        "category": "keyword",
+        "importance": "integer",
+        "source_session": "keyword",
+        "committed_at": "datetime",
+    }
+
     def _ensure_collection(self):
-        """Create collection if it doesn't exist."""
+        """Create collection if it doesn't exist, and its payload indexes."""
         import httpx
         try:
             resp = httpx.get(f"{self.url}/collections/{self.collection}", timeout=5)
+            existing: Dict[str, Any] = {}
             if resp.status_code == 404:
-                httpx.put(
+                created = httpx.put(
                     f"{self.url}/collections/{self.collection}",
-                    json={
-                        "vectors": {"size": 1536, "distance": "Cosine"},
-                    },
+                    json=self._collection_config(),
                     timeout=10,
                 )
+                if created.status_code == 200:
+                    # Empty: the local indexes cover it
+                    if self.dedup_index is not None:
+                        self.dedup_index.complete = True
+                    if self.lexical is not None:
+                        self.lexical.complete = True
+            elif resp.status_code == 200:
+                result = resp.json().get("result", {})
+                existing = result.get("payload_schema", {})
+                if self.quantization and not result.get("config", {}).get("quantization_config"):
+                    httpx.patch(
+                        f"{self.url}/collections/{self.collection}",
+                        json={"quantization_config": self._quantization_config()},
+                        timeout=10,
+                    )
+            for field_name, schema in self.PAYLOAD_INDEXES.items():
+                if field_name not in existing:
+                    httpx.put(
+                        f"{self.url}/collections/{self.collection}/index",
+                        json={"field_name": field_name, "field_schema": schema},
+                        timeout=10,
+                    )
         except Exception:
             pass  # Best effort
 
-    def _embed(self, text: str) -> List[float]:
-        """Get embedding vector for text."""
+    def _collection_config(self) -> Dict[str, Any]:
+        """
+        Collection schema. With quantization, Qdrant keeps the compact codes
+        in RAM and the full-precision vectors on disk for rescoring.
+        """
+        config: Dict[str, Any] = {
+            "vectors": {"size": self.embedder.dimension, "distance": "Cosine"},
+        }
+        if self.quantization is not None:
+            config["vectors"]["on_disk"] = True
+            config["quantization_config"] = self._quantization_config()
+        return config
+
+    def _quantization_config(self) -> Dict[str, Any]:
+        if self.quantization == "int8":
+            return {"scalar": {"type": "int8", "quantile": 0.99, "always_ram": True}}
+        return {"binary": {"always_ram": True}}
+
+    def _search_body(
+        self,
+        vector: List[float],
+        limit: int,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        body: Dict[str, Any] = {
+            "vector": vector,
+            "limit": limit,
+            "with_payload": True,
+        }
+        if filter:
+            body["filter"] = to_qdrant(filter)
+        if self.quantization is not None:
+            body["params"] = {
+                "quantization": {"rescore": True, "oversampling": self.oversampling},
+            }
+        return body
+
+    def _remember(self, commit_hashes: List[str]) -> None:
+        """Record hashes known to be stored."""
+        self._seen_hashes.update(commit_hashes)
+        if self.dedup_index is not None:
+            self.dedup_index.add_many(commit_hashes)
+
+    def _stored(self, memories: List[Memory]) -> None:
+        """Record memories just written: dedup caches and the lexical index."""
+        self._remember([m.commit_hash for m in memories])
+        # A partial index would only bias fusion towards this process's
+        # commits (and grow unbounded), so index once it covers everything
+        if self.lexical is not None and (self._warming_lexical or self.lexical.complete):
+            try:
+                self.lexical.add_many(self._payload(m) for m in memories)
+            except Exception:
+                pass  # search falls back to vector-only for these
+
+    def _known_absent(self, commit_hash: str) -> bool:
+        """True when the local index proves the hash was never stored."""
+        return (
+            self.dedup_index is not None
+            and self.dedup_index.complete
+            and commit_hash not in self.dedup_index
+        )
+
+    def warm_dedup_index(self, page_size: int = 1000) -> int:
+        """
+        Load every stored commit_hash into the dedup index with a paginated
+        scroll, then mark it complete so negatives resolve locally. Run once
+        per index file; returns the number of hashes added.
+        """
+        if self.dedup_index is None:
+            raise ValueError("QdrantBackend was created without dedup_index_path")
         import httpx
+        added = 0
+        offset = None
+        while True:
+            body: Dict[str, Any] = {
+                "limit": page_size,
+                "with_payload": ["commit_hash"],
+                "with_vector": False,
+            }
+            if offset is not None:
+                body["offset"] = offset
+            resp = httpx.post(
+                f"{self.url}/collections/{self.collection}/points/scroll",
+                json=body,
+                timeout=30,
+            )
+            resp.raise_for_status()
+            result = resp.json().get("result", {})
+            hashes = [
+                p["payload"]["commit_hash"]
+                for p in result.get("points", [])
+                if p.get("payload", {}).get("commit_hash")
+            ]
+            self.dedup_index.add_many(hashes)
+            added += len(hashes)
+            offset = result.get("next_page_offset")
+            if offset is None:
+                break
+        self.dedup_index.complete = True
+        self.dedup_index.flush()
+        return added
+
+    def warm_lexical_index(self, page_size: int = 1000) -> int:
+        """
+        Add every stored memory to the BM25 index with a paginated scroll,
+        then mark it complete. Run once per index file; returns the number
+        of memories added.
+        """
+        if self.lexical is None:
+            raise ValueError("QdrantBackend was created with hybrid=False")
+        self._warming_lexical = True  # commits made during the scan are indexed too
+        try:
+            added = self._scroll_into_lexical(page_size)
+        finally:
+            self._warming_lexical = False
+        self.lexical.complete = True
+        return added
+
+    def _scroll_into_lexical(self, page_size: int) -> int:
+        import httpx
+        added = 0
+        offset = None
+        while True:
+            body: Dict[str, Any] = {"limit": page_size, "with_payload": True, "with_vector": False}
+            if offset is not None:
+                body["offset"] = offset
+            resp = httpx.post(
+                f"{self.url}/collections/{self.collection}/points/scroll",
+                json=body,
+                timeout=30,
+            )
+            resp.raise_for_status()
+            result = resp.json().get("result", {})
+            added += self.lexical.add_many(
+                p["payload"] for p in result.get("points", [])
+                if p.get("payload", {}).get("commit_hash")
+            )
+            offset = result.get("next_page_offset")
+            if offset is None:
+                break
+        return added
+
+    # -- Maintenance --------------------------------------------------------
+
+    def scroll(
+        self,
+        offset: Any = None,
+        limit: int = 256,
+    ) -> Tuple[List[Tuple[Any, List[float], Memory]], Any]:
+        """
+        One page of the collection: ([(point_id, vector, memory)], next_offset).
+        ``next_offset`` is None after the last page.
+        """
+        import httpx
+        body: Dict[str, Any] = {"limit": limit, "with_payload": True, "with_vector": True}
+        if offset is not None:
+            body["offset"] = offset
         resp = httpx.post(
-            "https://api.openai.com/v1/embeddings",
-            headers={
-                "Authorization": f"Bearer {self.embedding_api_key}",
-                "Content-Type": "application/json",
-            },
-            json={"model": self.embedding_model, "input": text},
-            timeout=30,
+            f"{self.url}/collections/{self.collection}/points/scroll",
+            json=body,
+            timeout=60,
+        )
+        resp.raise_for_status()
+        result = resp.json().get("result", {})
+        records = [
+            (p["id"], p["vector"], self._to_memory(p))
+            for p in result.get("points", [])
+            if p.get("payload", {}).get("text") is not None
+        ]
+        return records, result.get("next_page_offset")
+
+    def fetch_vectors(self, commit_hashes: List[str]) -> Dict[str, List[float]]:
+        """Stored vectors of ``commit_hashes`` (those found), without re-embedding."""
+        import httpx
+        vectors: Dict[str, List[float]] = {}
+        wanted = list(dict.fromkeys(commit_hashes))
+        for start in range(0, len(wanted), 256):
+            body = self._match_any_scroll(wanted[start:start + 256])
+            body.update(with_vector=True)
+            while True:
+                resp = httpx.post(
+                    f"{self.url}/collections/{self.collection}/points/scroll",
+                    json=body,
+                    timeout=60,
+                )
+                resp.raise_for_status()
+                result = resp.json().get("result", {})
+                for p in result.get("points", []):
+                    vectors[p["payload"]["commit_hash"]] = p["vector"]
+                if result.get("next_page_offset") is None:
+                    break
+                body["offset"] = result["next_page_offset"]
+        return vectors
+
+    def delete_many(
+        self,
+        point_ids: List[Any],
+        commit_hashes: Optional[List[str]] = None,
+    ) -> int:
+        """
+        Delete points by id; returns how many were deleted. ``commit_hashes``
+        no longer stored anywhere are also dropped from the lexical index.
+        """
+        if not point_ids:
+            return 0
+        import httpx
+        resp = httpx.post(
+            f"{self.url}/collections/{self.collection}/points/delete",
+            params={"wait": "true"},
+            json={"points": list(point_ids)},
+            timeout=60,
         )
         resp.raise_for_status()
-        return resp.json()["data"][0]["embedding"]
+        if self.lexical is not None and commit_hashes:
+            self.lexical.remove_many(commit_hashes)
+        return len(point_ids)
+
+    # -- Hybrid search ------------------------------------------------------
+
+    def _lexical_hits(self, query: str, limit: int, filter: Optional[Dict[str, Any]] = None):
+        """
+        BM25 candidates for ``query`` and whether they answer it alone:
+        the index is complete, the query contains an exact value, and
+        enough memories match every query term (all of them, if every
+        term is an exact value). Filters are applied to the payloads.
+        """
+        if self.lexical is None or not self.lexical.complete:
+            return [], False
+        try:
+            hits = self.lexical.search(query, limit * self.fusion_candidates * (4 if filter else 1))
+            if filter:
+                hits = [hit for hit in hits if matches(hit[0], filter)]
+        except Exception:
+            return [], False
+        terms = tokenize(query, parts=False)
+        exact = [t for t in terms if is_exact_token(t)]
+        full = [payload for payload, _, matches_all in hits if matches_all]
+        sufficient = bool(full) and (len(exact) == len(terms) or len(full) >= limit)
+        return hits, bool(exact) and sufficient
+
+    def _fuse(
+        self,
+        lexical_hits: List[Any],
+        dense_points: List[Dict[str, Any]],
+        limit: int,
+    ) -> List[Memory]:
+        """Reciprocal-rank fusion of BM25 hits and vector search points."""
+        payloads: Dict[str, Dict[str, Any]] = {}
+        dense_ranking = []
+        for point in dense_points:
+            key = point["payload"].get("commit_hash") or str(point.get("id"))
+            payloads.setdefault(key, point["payload"])
+            dense_ranking.append(key)
+        lexical_ranking = []
+        for payload, _, _ in lexical_hits:
+            payloads.setdefault(payload["commit_hash"], payload)
+            lexical_ranking.append(payload["commit_hash"])
+        fused = reciprocal_rank_fusion([dense_ranking, lexical_ranking], k=self.rrf_k)
+        return [self._to_memory({"payload": payloads[key]}) for key in fused[:limit]]
+
+    def _lexical_only(self, lexical_hits: List[Any], limit: int) -> List[Memory]:
+        self.lexical_only_searches += 1
+        full = [payload for payload, _, matches_all in lexical_hits if matches_all]
+        return [self._to_memory({"payload": payload}) for payload in full[:limit]]
+
+    def _dense_limit(self, lexical_hits: List[Any], limit: int) -> int:
+        return limit * self.fusion_candidates if lexical_hits else limit
+
+    def _merge(self, lexical_hits: List[Any], points: List[Dict[str, Any]], limit: int) -> List[Memory]:
+        try:
+            if lexical_hits:
+                return self._fuse(lexical_hits, points, limit)
+            return [self._to_memory(p) for p in points]
+        except Exception:
+            return self._fuse(lexical_hits, [], limit) if lexical_hits else []
+
+    def _embed(self, text: str) -> List[float]:
+        """Get embedding vector for text."""
+        return self._embed_many([text])[0]
+
+    def _embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Get embedding vectors for many texts, calling the embedder only for cache misses."""
+        return self.embedding_cache.embed(self.embedder, texts)
+
+    def _payload(self, memory: Memory) -> Dict[str, Any]:
+        return {
+            "text": memory.text,
+            "category": memory.category,
+            "importance": memory.importance,
+            "source_session": memory.source_session,
+            "commit_hash": memory.commit_hash,
+            "committed_at": memory.committed_at,
+            "extraction_model": memory.extraction_model,
+            **memory.metadata,
+        }
+
+    @staticmethod
+    def _to_memory(point: Dict[str, Any]) -> Memory:
+        payload = point["payload"]
+        return Memory(
+            text=payload["text"],
+            category=payload.get("category", ""),
+            importance=payload.get("importance", 0),
+            commit_hash=payload.get("commit_hash", ""),
+            source_session=payload.get("source_session", ""),
+            committed_at=payload.get("committed_at", ""),
+        )
 
     def commit(self, memory: Memory) -> bool:
         """Store a memory in Qdrant."""
@@ -74,59 +468,121 @@ class QdrantBackend:
                     "points": [{
                         "id": point_id,
                         "vector": vector,
-                        "payload": {
-                            "text": memory.text,
-                            "category": memory.category,
-                            "importance": memory.importance,
-                            "source_session": memory.source_session,
-                            "commit_hash": memory.commit_hash,
-                            "committed_at": memory.committed_at,
-                            "extraction_model": memory.extraction_model,
-                            **memory.metadata,
-                        },
+                        "payload": self._payload(memory),
                     }],
                 },
                 timeout=10,
             )
             resp.raise_for_status()
-            self._seen_hashes.add(memory.commit_hash)
+            self._stored([memory])
             return True
         except Exception:
             return False
 
-    def search(self, query: str, limit: int = 5) -> List[Memory]:
-        """Semantic search over rescued memories."""
+    def commit_many(self, memories: List[Memory]) -> List[bool]:
+        """
+        Store many memories with one batched embedding call and chunked
+        upserts. Returns per-memory success, in input order.
+        """
+        if not memories:
+            return []
+        import httpx
+        try:
+            vectors = self._embed_many([m.text for m in memories])
+        except Exception:
+            return [False] * len(memories)
+
+        results: List[bool] = []
+        for start in range(0, len(memories), self.upsert_batch_size):
+            chunk = memories[start:start + self.upsert_batch_size]
+            points = [
+                {
+                    "id": str(uuid.uuid4()),
+                    "vector": vector,
+                    "payload": self._payload(mem),
+                }
+                for mem, vector in zip(chunk, vectors[start:start + len(chunk)])
+            ]
+            try:
+                resp = httpx.put(
+                    f"{self.url}/collections/{self.collection}/points",
+                    json={"points": points},
+                    timeout=30,
+                )
+                resp.raise_for_status()
+                self._stored(chunk)
+                results.extend([True] * len(chunk))
+            except Exception:
+                results.extend([False] * len(chunk))
+        return results
+
+    def search(
+        self,
+        query: str,
+        limit: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Memory]:
+        """Hybrid (BM25 + vector) search over rescued memories."""
+        lexical_hits, answered = self._lexical_hits(query, limit, filter)
+        if answered:
+            return self._lexical_only(lexical_hits, limit)
         import httpx
         try:
             vector = self._embed(query)
             resp = httpx.post(
                 f"{self.url}/collections/{self.collection}/points/search",
-                json={
-                    "vector": vector,
-                    "limit": limit,
-                    "with_payload": True,
-                },
+                json=self._search_body(vector, self._dense_limit(lexical_hits, limit), filter),
                 timeout=10,
             )
             resp.raise_for_status()
             results = resp.json().get("result", [])
-            return [
-                Memory(
-                    text=r["payload"]["text"],
-                    category=r["payload"].get("category", ""),
-                    importance=r["payload"].get("importance", 0),
-                    commit_hash=r["payload"].get("commit_hash", ""),
-                    source_session=r["payload"].get("source_session", ""),
-                )
-                for r in results
-            ]
         except Exception:
-            return []
+            results = []
+        return self._merge(lexical_hits, results, limit)
+
+    def search_many(
+        self,
+        queries: List[str],
+        limit: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Memory]]:
+        """
+        Search several queries with one batched embedding call and one
+        ``points/search/batch`` request. Returns results per query.
+        """
+        lexical = [self._lexical_hits(q, limit, filter) for q in queries]
+        out: List[List[Memory]] = [
+            self._lexical_only(hits, limit) if answered else []
+            for hits, answered in lexical
+        ]
+        pending = [i for i, (_, answered) in enumerate(lexical) if not answered]
+        if not pending:
+            return out
+        import httpx
+        try:
+            vectors = self._embed_many([queries[i] for i in pending])
+            resp = httpx.post(
+                f"{self.url}/collections/{self.collection}/points/search/batch",
+                json={"searches": [
+                    self._search_body(vector, self._dense_limit(lexical[i][0], limit), filter)
+                    for i, vector in zip(pending, vectors)
+                ]},
+                timeout=30,
+            )
+            resp.raise_for_status()
+            batches = resp.json().get("result", [])
+        except Exception:
+            batches = [[] for _ in pending]
+        for i, points in zip(pending, batches):
+            out[i] = self._merge(lexical[i][0], points, limit)
+        return out
 
     def deduplicate(self, commit_hash: str) -> bool:
         """Check if memory with this hash already exists."""
         if commit_hash in self._seen_hashes:
             return True
+        if self._known_absent(commit_hash):
+            return False
         import httpx
         try:
             resp = httpx.post(
@@ -142,13 +598,325 @@ class QdrantBackend:
             if resp.status_code == 200:
                 points = resp.json().get("result", {}).get("points", [])
                 if points:
-                    self._seen_hashes.add(commit_hash)
+                    self._remember([commit_hash])
+                    return True
+        except Exception:
+            pass
+        return False
+
+    def _dedup_candidates(self, commit_hashes: List[str]):
+        """Split hashes into (known stored, needs a server lookup)."""
+        found = {h for h in commit_hashes if h in self._seen_hashes}
+        unknown = [
+            h for h in dict.fromkeys(commit_hashes)
+            if h not in found and not self._known_absent(h)
+        ]
+        return found, unknown
+
+    def _match_any_scroll(self, commit_hashes: List[str], offset: Any = None) -> Dict[str, Any]:
+        body: Dict[str, Any] = {
+            "filter": {
+                "must": [{"key": "commit_hash", "match": {"any": commit_hashes}}]
+            },
+            "limit": len(commit_hashes),
+            "with_payload": ["commit_hash"],
+            "with_vector": False,
+        }
+        if offset is not None:
+            body["offset"] = offset
+        return body
+
+    def deduplicate_many(self, commit_hashes: List[str]) -> set:
+        """
+        Return the subset of ``commit_hashes`` already stored, using one
+        ``match any`` filtered scroll for everything not resolved locally.
+        """
+        found, unknown = self._dedup_candidates(commit_hashes)
+        if not unknown:
+            return found
+        import httpx
+        try:
+            offset = None
+            while True:
+                resp = httpx.post(
+                    f"{self.url}/collections/{self.collection}/points/scroll",
+                    json=self._match_any_scroll(unknown, offset),
+                    timeout=10,
+                )
+                resp.raise_for_status()
+                result = resp.json().get("result", {})
+                hits = [p["payload"]["commit_hash"] for p in result.get("points", [])]
+                found.update(hits)
+                self._remember(hits)
+                offset = result.get("next_page_offset")
+                if offset is None:
+                    break
+        except Exception:
+            pass
+        return found
+
+    # -- Nearest neighbours (semantic dedup) -------------------------------
+
+    def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Embed through the backend's cache, so a later commit reuses the vectors."""
+        return self._embed_many(texts)
+
+    async def aembed_many(self, texts: List[str]) -> List[List[float]]:
+        return await self._aembed_many(texts)
+
+    def _neighbour_searches(
+        self,
+        vectors: List[List[float]],
+        k: int,
+        threshold: Optional[float],
+    ) -> Dict[str, Any]:
+        searches = []
+        for vector in vectors:
+            body = self._search_body(vector, k)
+            if threshold is not None:
+                body["score_threshold"] = threshold
+            searches.append(body)
+        return {"searches": searches}
+
+    def _scored(self, batches: List[List[Dict[str, Any]]]) -> List[List[Tuple[float, Memory]]]:
+        return [[(p["score"], self._to_memory(p)) for p in points] for points in batches]
+
+    def nearest_many(
+        self,
+        vectors: List[List[float]],
+        k: int = 3,
+        threshold: Optional[float] = None,
+    ) -> List[List[Tuple[float, Memory]]]:
+        """Top-``k`` stored neighbours (score, memory) of each vector, one batch request."""
+        if not vectors:
+            return []
+        import httpx
+        try:
+            resp = httpx.post(
+                f"{self.url}/collections/{self.collection}/points/search/batch",
+                json=self._neighbour_searches(vectors, k, threshold),
+                timeout=30,
+            )
+            resp.raise_for_status()
+            return self._scored(resp.json().get("result", []))
+        except Exception:
+            return [[] for _ in vectors]
+
+    async def anearest_many(
+        self,
+        vectors: List[List[float]],
+        k: int = 3,
+        threshold: Optional[float] = None,
+    ) -> List[List[Tuple[float, Memory]]]:
+        if not vectors:
+            return []
+        try:
+            resp = await self._aclient().post(
+                f"{self.url}/collections/{self.collection}/points/search/batch",
+                json=self._neighbour_searches(vectors, k, threshold),
+            )
+            resp.raise_for_status()
+            return self._scored(resp.json().get("result", []))
+        except Exception:
+            return [[] for _ in vectors]
+
+    # -- Async variants: same semantics, non-blocking I/O -----------------
+
+    def _aclient(self) -> "httpx.AsyncClient":
+        """Return the pooled async client for the running loop, creating it lazily."""
+        import httpx
+        loop = asyncio.get_running_loop()
+        client = self._async_client
+        if client is None or client.is_closed or self._async_client_loop is not loop:
+            # A client is tied to the loop its connections were opened on;
+            # one left behind on another loop is simply dropped.
+            client = self._async_client = httpx.AsyncClient(
+                timeout=30,
+                limits=httpx.Limits(max_connections=max(10, self.max_concurrency * 2)),
+            )
+            self._async_client_loop = loop
+        return client
+
+    async def aclose(self) -> None:
+        """Close the pooled async client (it is recreated on next use)."""
+        client, loop = self._async_client, self._async_client_loop
+        self._async_client = None
+        self._async_client_loop = None
+        if client is not None and loop is asyncio.get_running_loop():
+            await client.aclose()
+
+    async def _aembed_many(self, texts: List[str]) -> List[List[float]]:
+        return await self.embedding_cache.aembed(self.embedder, texts)
+
+    async def acommit(self, memory: Memory) -> bool:
+        """Store a memory in Qdrant without blocking the event loop."""
+        return (await self.acommit_many([memory]))[0]
+
+    async def acommit_many(self, memories: List[Memory]) -> List[bool]:
+        """
+        Async commit_many: one batched embedding call, then chunked upserts
+        sent concurrently (at most ``max_concurrency`` in flight).
+        """
+        if not memories:
+            return []
+        try:
+            vectors = await self._aembed_many([m.text for m in memories])
+        except Exception:
+            return [False] * len(memories)
+
+        client = self._aclient()
+        sem = asyncio.Semaphore(self.max_concurrency)
+
+        async def upsert(start: int) -> List[bool]:
+            chunk = memories[start:start + self.upsert_batch_size]
+            points = [
+                {
+                    "id": str(uuid.uuid4()),
+                    "vector": vector,
+                    "payload": self._payload(mem),
+                }
+                for mem, vector in zip(chunk, vectors[start:start + len(chunk)])
+            ]
+            async with sem:
+                try:
+                    resp = await client.put(
+                        f"{self.url}/collections/{self.collection}/points",
+                        json={"points": points},
+                    )
+                    resp.raise_for_status()
+                except Exception:
+                    return [False] * len(chunk)
+            self._stored(chunk)
+            return [True] * len(chunk)
+
+        chunks = await asyncio.gather(*[
+            upsert(start) for start in range(0, len(memories), self.upsert_batch_size)
+        ])
+        return [ok for chunk in chunks for ok in chunk]
+
+    async def asearch(
+        self,
+        query: str,
+        limit: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Memory]:
+        """Async hybrid (BM25 + vector) search over rescued memories."""
+        lexical_hits, answered = await asyncio.to_thread(self._lexical_hits, query, limit, filter)
+        if answered:
+            return self._lexical_only(lexical_hits, limit)
+        try:
+            vector = (await self._aembed_many([query]))[0]
+            resp = await self._aclient().post(
+                f"{self.url}/collections/{self.collection}/points/search",
+                json=self._search_body(vector, self._dense_limit(lexical_hits, limit), filter),
+                timeout=10,
+            )
+            resp.raise_for_status()
+            results = resp.json().get("result", [])
+        except Exception:
+            results = []
+        return self._merge(lexical_hits, results, limit)
+
+    async def asearch_many(
+        self,
+        queries: List[str],
+        limit: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Memory]]:
+        """Async search_many: one batched embedding call, one batch search request."""
+        lexical = await asyncio.to_thread(
+            lambda: [self._lexical_hits(q, limit, filter) for q in queries]
+        )
+        out: List[List[Memory]] = [
+            self._lexical_only(hits, limit) if answered else []
+            for hits, answered in lexical
+        ]
+        pending = [i for i, (_, answered) in enumerate(lexical) if not answered]
+        if not pending:
+            return out
+        try:
+            vectors = await self._aembed_many([queries[i] for i in pending])
+            resp = await self._aclient().post(
+                f"{self.url}/collections/{self.collection}/points/search/batch",
+                json={"searches": [
+                    self._search_body(vector, self._dense_limit(lexical[i][0], limit), filter)
+                    for i, vector in zip(pending, vectors)
+                ]},
+            )
+            resp.raise_for_status()
+            batches = resp.json().get("result", [])
+        except Exception:
+            batches = [[] for _ in pending]
+        for i, points in zip(pending, batches):
+            out[i] = self._merge(lexical[i][0], points, limit)
+        return out
+
+    async def adeduplicate_many(self, commit_hashes: List[str]) -> set:
+        """Async deduplicate_many: one filtered scroll for the whole batch."""
+        found, unknown = self._dedup_candidates(commit_hashes)
+        if not unknown:
+            return found
+        try:
+            client = self._aclient()
+            offset = None
+            while True:
+                resp = await client.post(
+                    f"{self.url}/collections/{self.collection}/points/scroll",
+                    json=self._match_any_scroll(unknown, offset),
+                    timeout=10,
+                )
+                resp.raise_for_status()
+                result = resp.json().get("result", {})
+                hits = [p["payload"]["commit_hash"] for p in result.get("points", [])]
+                found.update(hits)
+                self._remember(hits)
+                offset = result.get("next_page_offset")
+                if offset is None:
+                    break
+        except Exception:
+            pass
+        return found
+
+    async def adeduplicate(self, commit_hash: str) -> bool:
+        """Async check for an existing memory with this hash."""
+        if commit_hash in self._seen_hashes:
+            return True
+        if self._known_absent(commit_hash):
+            return False
+        try:
+            resp = await self._aclient().post(
+                f"{self.url}/collections/{self.collection}/points/scroll",
+                json={
+                    "filter": {
+                        "must": [{"key": "commit_hash", "match": {"value": commit_hash}}]
+                    },
+                    "limit": 1,
+                },
+                timeout=5,
+            )
+            if resp.status_code == 200:
+                points = resp.json().get("result", {}).get("points", [])
+                if points:
+                    self._remember([commit_hash])
                     return True
         except Exception:
             pass
         return False
 
 
+class _ChromaEmbeddingFunction:
+    """Adapts an Embedder to chromadb's embedding-function interface."""
+
+    def __init__(self, embedder: Embedder):
+        self.embedder = embedder
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        return self.embedder.embed(list(input))
+
+    def name(self) -> str:
+        return self.embedder.model
+
+
 class ChromaBackend:
     """ChromaDB backend for local/embedded use."""
 
@@ -156,48 +924,91 @@ class ChromaBackend:
         self,
         path: str = "./chroma_data",
         collection: str = "agent_memory",
+        embedder: Optional[Embedder] = None,
     ):
         try:
             import chromadb
             self.client = chromadb.PersistentClient(path=path)
-            self.collection = self.client.get_or_create_collection(collection)
+            kwargs: Dict[str, Any] = {}
+            if embedder is not None:
+                kwargs["embedding_function"] = _ChromaEmbeddingFunction(embedder)
+            self.collection = self.client.get_or_create_collection(collection, **kwargs)
         except ImportError:
             raise ImportError("pip install chromadb")
 
+    @staticmethod
+    def _metadata(memory: Memory) -> Dict[str, Any]:
+        return {
+            "category": memory.category,
+            "importance": memory.importance,
+            "source_session": memory.source_session,
+            "committed_at": memory.committed_at,
+            # Chroma ranges are numeric-only; committed_at filters use this
+            "committed_ts": to_timestamp(memory.committed_at),
+        }
+
     def commit(self, memory: Memory) -> bool:
         try:
             self.collection.add(
                 documents=[memory.text],
                 ids=[memory.commit_hash],
-                metadatas=[{
-                    "category": memory.category,
-                    "importance": memory.importance,
-                    "source_session": memory.source_session,
-                    "committed_at": memory.committed_at,
-                }],
+                metadatas=[self._metadata(memory)],
             )
             return True
         except Exception:
             return False
 
-    def search(self, query: str, limit: int = 5) -> List[Memory]:
+    def commit_many(self, memories: List[Memory]) -> List[bool]:
+        if not memories:
+            return []
         try:
-            results = self.collection.query(query_texts=[query], n_results=limit)
+            self.collection.add(
+                documents=[m.text for m in memories],
+                ids=[m.commit_hash for m in memories],
+                metadatas=[self._metadata(m) for m in memories],
+            )
+            return [True] * len(memories)
+        except Exception:
+            return [False] * len(memories)
+
+    def search(
+        self,
+        query: str,
+        limit: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Memory]:
+        return self.search_many([query], limit, filter)[0]
+
+    def search_many(
+        self,
+        queries: List[str],
+        limit: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Memory]]:
+        """One multi-query ``query_texts`` call; results per query."""
+        if not queries:
+            return []
+        try:
+            kwargs: Dict[str, Any] = {}
+            if filter:
+                kwargs["where"] = to_chroma(filter)
+            results = self.collection.query(query_texts=list(queries), n_results=limit, **kwargs)
             return [
-                Memory(
-                    text=doc,
-                    category=meta.get("category", ""),
-                    importance=meta.get("importance", 0),
-                    commit_hash=id_,
-                )
-                for doc, meta, id_ in zip(
-                    results["documents"][0],
-                    results["metadatas"][0],
-                    results["ids"][0],
+                [
+                    Memory(
+                        text=doc,
+                        category=meta.get("category", ""),
+                        importance=meta.get("importance", 0),
+                        commit_hash=id_,
+                    )
+                    for doc, meta, id_ in zip(docs, metas, ids)
+                ]
+                for docs, metas, ids in zip(
+                    results["documents"], results["metadatas"], results["ids"],
                 )
             ]
         except Exception:
-            return []
+            return [[] for _ in queries]
 
     def deduplicate(self, commit_hash: str) -> bool:
         try:
@@ -206,6 +1017,45 @@ class ChromaBackend:
         except Exception:
             return False
 
+    def deduplicate_many(self, commit_hashes: List[str]) -> set:
+        if not commit_hashes:
+            return set()
+        try:
+            result = self.collection.get(ids=list(dict.fromkeys(commit_hashes)), include=[])
+            return set(result["ids"])
+        except Exception:
+            return set()
+
+    # chromadb's client is sync-only, so the async variants run in a thread.
+
+    async def acommit(self, memory: Memory) -> bool:
+        return await asyncio.to_thread(self.commit, memory)
+
+    async def acommit_many(self, memories: List[Memory]) -> List[bool]:
+        return await asyncio.to_thread(self.commit_many, memories)
+
+    async def asearch(
+        self,
+        query: str,
+        limit: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Memory]:
+        return await asyncio.to_thread(self.search, query, limit, filter)
+
+    async def asearch_many(
+        self,
+        queries: List[str],
+        limit: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Memory]]:
+        return await asyncio.to_thread(self.search_many, queries, limit, filter)
+
+    async def adeduplicate(self, commit_hash: str) -> bool:
+        return await asyncio.to_thread(self.deduplicate, commit_hash)
+
+    async def adeduplicate_many(self, commit_hashes: List[str]) -> set:
+        return await asyncio.to_thread(self.deduplicate_many, commit_hashes)
+
 
 class PineconeBackend:
     """Pinecone managed cloud backend."""
@@ -215,6 +1065,10 @@ class PineconeBackend:
         api_key: Optional[str] = None,
         index_name: str = "agent-memory",
         environment: str = "us-east-1",
+        upsert_batch_size: int = 100,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        embedder: Optional[Embedder] = None,
+        query_concurrency: int = 8,
     ):
         try:
             from pinecone import Pinecone
@@ -223,52 +1077,118 @@ class PineconeBackend:
         except ImportError:
             raise ImportError("pip install pinecone-client")
         
-        self.embedding_api_key = os.environ.get("OPENAI_API_KEY", "")
+        self.index_name = index_name
+        self.embedder = embedder or OpenAIEmbedder()
+        self.embedding_model = self.embedder.model
+        self.upsert_batch_size = upsert_batch_size
+        self.query_concurrency = query_concurrency
+        self.embedding_cache = embedding_cache or EmbeddingCache()
 
     def _embed(self, text: str) -> List[float]:
-        import httpx
-        resp = httpx.post(
-            "https://api.openai.com/v1/embeddings",
-            headers={"Authorization": f"Bearer {self.embedding_api_key}", "Content-Type": "application/json"},
-            json={"model": "text-embedding-3-small", "input": text},
-            timeout=30,
-        )
-        resp.raise_for_status()
-        return resp.json()["data"][0]["embedding"]
+        return self._embed_many([text])[0]
+
+    def _embed_many(self, texts: List[str]) -> List[List[float]]:
+        return self.embedding_cache.embed(self.embedder, texts)
+
+    def _vector(self, memory: Memory, vector: List[float]) -> Dict[str, Any]:
+        return {
+            "id": memory.commit_hash,
+            "values": vector,
+            "metadata": {
+                "text": memory.text,
+                "category": memory.category,
+                "importance": memory.importance,
+                "source_session": memory.source_session,
+                "committed_at": memory.committed_at,
+                # Pinecone ranges are numeric-only; committed_at filters use this
+                "committed_ts": to_timestamp(memory.committed_at),
+            },
+        }
 
     def commit(self, memory: Memory) -> bool:
         try:
             vector = self._embed(memory.text)
-            self.index.upsert(vectors=[{
-                "id": memory.commit_hash,
-                "values": vector,
-                "metadata": {
-                    "text": memory.text,
-                    "category": memory.category,
-                    "importance": memory.importance,
-                    "source_session": memory.source_session,
-                    "committed_at": memory.committed_at,
-                },
-            }])
+            self.index.upsert(vectors=[self._vector(memory, vector)])
             return True
         except Exception:
             return False
 
-    def search(self, query: str, limit: int = 5) -> List[Memory]:
+    def commit_many(self, memories: List[Memory]) -> List[bool]:
+        if not memories:
+            return []
+        try:
+            vectors = self._embed_many([m.text for m in memories])
+        except Exception:
+            return [False] * len(memories)
+        results: List[bool] = []
+        for start in range(0, len(memories), self.upsert_batch_size):
+            chunk = memories[start:start + self.upsert_batch_size]
+            try:
+                self.index.upsert(vectors=[
+                    self._vector(mem, vector)
+                    for mem, vector in zip(chunk, vectors[start:start + len(chunk)])
+                ])
+                results.extend([True] * len(chunk))
+            except Exception:
+                results.extend([False] * len(chunk))
+        return results
+
+    @staticmethod
+    def _to_memory(match: Dict[str, Any]) -> Memory:
+        return Memory(
+            text=match["metadata"]["text"],
+            category=match["metadata"].get("category", ""),
+            importance=match["metadata"].get("importance", 0),
+            commit_hash=match["id"],
+            source_session=match["metadata"].get("source_session", ""),
+            committed_at=match["metadata"].get("committed_at", ""),
+        )
+
+    def _query(
+        self,
+        vector: List[float],
+        limit: int,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Memory]:
+        try:
+            kwargs: Dict[str, Any] = {}
+            if filter:
+                kwargs["filter"] = to_pinecone(filter)
+            results = self.index.query(vector=vector, top_k=limit, include_metadata=True, **kwargs)
+            return [self._to_memory(m) for m in results["matches"]]
+        except Exception:
+            return []
+
+    def search(
+        self,
+        query: str,
+        limit: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Memory]:
         try:
             vector = self._embed(query)
-            results = self.index.query(vector=vector, top_k=limit, include_metadata=True)
-            return [
-                Memory(
-                    text=m["metadata"]["text"],
-                    category=m["metadata"].get("category", ""),
-                    importance=m["metadata"].get("importance", 0),
-                    commit_hash=m["id"],
-                )
-                for m in results["matches"]
-            ]
         except Exception:
             return []
+        return self._query(vector, limit, filter)
+
+    def search_many(
+        self,
+        queries: List[str],
+        limit: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Memory]]:
+        """
+        One batched embedding call, then the per-query index lookups in
+        parallel (Pinecone has no multi-vector query).
+        """
+        if not queries:
+            return []
+        try:
+            vectors = self._embed_many(queries)
+        except Exception:
+            return [[] for _ in queries]
+        with ThreadPoolExecutor(max_workers=min(len(vectors), self.query_concurrency)) as pool:
+            return list(pool.map(lambda v: self._query(v, limit, filter), vectors))
 
     def deduplicate(self, commit_hash: str) -> bool:
         try:
@@ -276,3 +1196,396 @@ class PineconeBackend:
             return len(result.get("vectors", {})) > 0
         except Exception:
             return False
+
+    def deduplicate_many(self, commit_hashes: List[str]) -> set:
+        found: set = set()
+        ids = list(dict.fromkeys(commit_hashes))
+        try:
+            for start in range(0, len(ids), 1000):  # fetch caps ids per call
+                result = self.index.fetch(ids=ids[start:start + 1000])
+                found.update(result.get("vectors", {}).keys())
+        except Exception:
+            pass
+        return found
+
+    def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Embed through the backend's cache, so a later commit reuses the vectors."""
+        return self._embed_many(texts)
+
+    def _neighbours(
+        self,
+        vector: List[float],
+        k: int,
+        threshold: Optional[float],
+    ) -> List[Tuple[float, Memory]]:
+        try:
+            results = self.index.query(vector=vector, top_k=k, include_metadata=True)
+            return [
+                (m["score"], self._to_memory(m)) for m in results["matches"]
+                if threshold is None or m["score"] >= threshold
+            ]
+        except Exception:
+            return []
+
+    def nearest_many(
+        self,
+        vectors: List[List[float]],
+        k: int = 3,
+        threshold: Optional[float] = None,
+    ) -> List[List[Tuple[float, Memory]]]:
+        """Top-``k`` stored neighbours (score, memory) of each vector, queried in parallel."""
+        if not vectors:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(vectors), self.query_concurrency)) as pool:
+            return list(pool.map(lambda v: self._neighbours(v, k, threshold), vectors))
+
+    def scroll(
+        self,
+        offset: Any = None,
+        limit: int = 100,
+    ) -> Tuple[List[Tuple[Any, List[float], Memory]], Any]:
+        """
+        One page of the index: ([(id, vector, memory)], next_offset), paging
+        through ``list_paginated`` and fetching the page's vectors.
+        """
+        kwargs: Dict[str, Any] = {"limit": limit}
+        if offset is not None:
+            kwargs["pagination_token"] = offset
+        page = self.index.list_paginated(**kwargs)
+        ids = [v.id for v in page.vectors]
+        fetched = self.index.fetch(ids=ids).vectors if ids else {}
+        records = [
+            (id_, list(fetched[id_].values), self._to_memory({
+                "id": id_, "metadata": fetched[id_].metadata,
+            }))
+            for id_ in ids if id_ in fetched
+        ]
+        pagination = getattr(page, "pagination", None)
+        return records, getattr(pagination, "next", None)
+
+    def fetch_vectors(self, commit_hashes: List[str]) -> Dict[str, List[float]]:
+        """Stored vectors of ``commit_hashes`` (those found), without re-embedding."""
+        vectors: Dict[str, List[float]] = {}
+        ids = list(dict.fromkeys(commit_hashes))
+        for start in range(0, len(ids), 1000):  # fetch caps ids per call
+            fetched = self.index.fetch(ids=ids[start:start + 1000]).vectors
+            vectors.update((id_, list(v.values)) for id_, v in fetched.items())
+        return vectors
+
+    def delete_many(
+        self,
+        point_ids: List[Any],
+        commit_hashes: Optional[List[str]] = None,
+    ) -> int:
+        """Delete vectors by id (ids are commit hashes); returns how many."""
+        for start in range(0, len(point_ids), 1000):  # delete caps ids per call
+            self.index.delete(ids=list(point_ids[start:start + 1000]))
+        return len(point_ids)
+
+    # Embeddings go through the embedder's async path; the pinecone index
+    # client is sync-only, so its calls are offloaded to a thread.
+
+    async def _aembed_many(self, texts: List[str]) -> List[List[float]]:
+        return await self.embedding_cache.aembed(self.embedder, texts)
+
+    async def acommit(self, memory: Memory) -> bool:
+        return (await self.acommit_many([memory]))[0]
+
+    async def acommit_many(self, memories: List[Memory]) -> List[bool]:
+        if not memories:
+            return []
+        try:
+            vectors = await self._aembed_many([m.text for m in memories])
+        except Exception:
+            return [False] * len(memories)
+
+        async def upsert(start: int) -> List[bool]:
+            chunk = memories[start:start + self.upsert_batch_size]
+            try:
+                await asyncio.to_thread(self.index.upsert, vectors=[
+                    self._vector(mem, vector)
+                    for mem, vector in zip(chunk, vectors[start:start + len(chunk)])
+                ])
+                return [True] * len(chunk)
+            except Exception:
+                return [False] * len(chunk)
+
+        chunks = await asyncio.gather(*[
+            upsert(start) for start in range(0, len(memories), self.upsert_batch_size)
+        ])
+        return [ok for chunk in chunks for ok in chunk]
+
+    async def asearch(
+        self,
+        query: str,
+        limit: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Memory]:
+        try:
+            vector = (await self._aembed_many([query]))[0]
+        except Exception:
+            return []
+        return await asyncio.to_thread(self._query, vector, limit, filter)
+
+    async def asearch_many(
+        self,
+        queries: List[str],
+        limit: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Memory]]:
+        if not queries:
+            return []
+        try:
+            vectors = await self._aembed_many(queries)
+        except Exception:
+            return [[] for _ in queries]
+        sem = asyncio.Semaphore(self.query_concurrency)
+
+        async def query(vector: List[float]) -> List[Memory]:
+            async with sem:
+                return await asyncio.to_thread(self._query, vector, limit, filter)
+
+        return list(await asyncio.gather(*[query(v) for v in vectors]))
+
+    async def adeduplicate(self, commit_hash: str) -> bool:
+        return await asyncio.to_thread(self.deduplicate, commit_hash)
+
+    async def adeduplicate_many(self, commit_hashes: List[str]) -> set:
+        return await asyncio.to_thread(self.deduplicate_many, commit_hashes)
+
+    async def aembed_many(self, texts: List[str]) -> List[List[float]]:
+        return await self._aembed_many(texts)
+
+    async def anearest_many(
+        self,
+        vectors: List[List[float]],
+        k: int = 3,
+        threshold: Optional[float] = None,
+    ) -> List[List[Tuple[float, Memory]]]:
+        sem = asyncio.Semaphore(self.query_concurrency)
+
+        async def query(vector: List[float]) -> List[Tuple[float, Memory]]:
+            async with sem:
+                return await asyncio.to_thread(self._neighbours, vector, k, threshold)
+
+        return list(await asyncio.gather(*[query(v) for v in vectors]))
+
+
+class LocalBackend:
+    """
+    In-process backend for single-node deployments: vectors live in a
+    memory-mapped NumPy matrix on local disk, so commit, search and
+    deduplicate make no network calls beyond the embedder (none at all
+    with a LocalEmbedder).
+
+    Large stores can search an IVF index instead of scanning every row
+    (``index="ivf"``; ``nprobe`` trades latency for recall), optionally
+    combined with ``quantization``. Both are approximate: see
+    ``VectorStore`` for what they cost in recall, and measure it with
+    ``backend.store.evaluate_recall`` before relying on them.
+
+    Usage:
+        backend = LocalBackend(path="./memory_store", embedder=LocalEmbedder("./minilm"))
+    """
+
+    def __init__(
+        self,
+        path: str = "./cartu_store",
+        embedder: Optional[Embedder] = None,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        block_rows: int = 262_144,
+        quantization: Optional[str] = None,
+        rescore_factor: Optional[int] = None,
+        index: Optional[str] = None,
+        nlist: Optional[int] = None,
+        nprobe: int = 16,
+        min_train_rows: int = 50_000,
+    ):
+        try:
+            from .vectorstore import VectorStore
+        except ImportError:
+            raise ImportError("pip install numpy")
+        self.embedder = embedder or OpenAIEmbedder()
+        self.embedding_model = self.embedder.model
+        self.embedding_cache = embedding_cache or EmbeddingCache()
+        self.store = VectorStore(
+            path,
+            self.embedder.dimension,
+            block_rows=block_rows,
+            quantization=quantization,
+            rescore_factor=rescore_factor,
+            index=index,
+            nlist=nlist,
+            nprobe=nprobe,
+            min_train_rows=min_train_rows,
+        )
+
+    def _embed_many(self, texts: List[str]) -> List[List[float]]:
+        return self.embedding_cache.embed(self.embedder, texts)
+
+    @staticmethod
+    def _payload(memory: Memory) -> Dict[str, Any]:
+        return {
+            "text": memory.text,
+            "category": memory.category,
+            "importance": memory.importance,
+            "source_session": memory.source_session,
+            "commit_hash": memory.commit_hash,
+            "committed_at": memory.committed_at,
+            "extraction_model": memory.extraction_model,
+            **memory.metadata,
+        }
+
+    @staticmethod
+    def _to_memory(payload: Dict[str, Any]) -> Memory:
+        return Memory(
+            text=payload["text"],
+            category=payload.get("category", ""),
+            importance=payload.get("importance", 0),
+            commit_hash=payload.get("commit_hash", ""),
+            source_session=payload.get("source_session", ""),
+            committed_at=payload.get("committed_at", ""),
+        )
+
+    def commit(self, memory: Memory) -> bool:
+        return self.commit_many([memory])[0]
+
+    def commit_many(self, memories: List[Memory]) -> List[bool]:
+        if not memories:
+            return []
+        try:
+            vectors = self._embed_many([m.text for m in memories])
+            self.store.append(
+                vectors,
+                [m.commit_hash for m in memories],
+                [self._payload(m) for m in memories],
+            )
+            return [True] * len(memories)
+        except Exception:
+            return [False] * len(memories)
+
+    def search(
+        self,
+        query: str,
+        limit: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Memory]:
+        return self.search_many([query], limit, filter)[0]
+
+    def search_many(
+        self,
+        queries: List[str],
+        limit: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Memory]]:
+        """One batched embedding call and one matrix search for all queries."""
+        if not queries:
+            return []
+        try:
+            vectors = self._embed_many(queries)
+            if filter:
+                return [self._filtered_search(v, limit, filter) for v in vectors]
+            hits = self.store.search(vectors, limit)
+            return [
+                [self._to_memory(p) for p in self.store.payloads(rows.tolist())]
+                for rows, _ in hits
+            ]
+        except Exception:
+            return [[] for _ in queries]
+
+    def _filtered_search(
+        self,
+        vector: List[float],
+        limit: int,
+        filter: Dict[str, Any],
+    ) -> List[Memory]:
+        """
+        Payloads aren't indexed on disk, so over-fetch nearest neighbours and
+        filter them, widening the search (finally to an exact scan) until
+        ``limit`` matches are found.
+        """
+        k = limit * 4
+        while True:
+            exhaustive = k >= len(self.store)
+            rows, _ = self.store.search([vector], k, exact=exhaustive)[0]
+            payloads = [p for p in self.store.payloads(rows.tolist()) if matches(p, filter)]
+            if len(payloads) >= limit or exhaustive:
+                return [self._to_memory(p) for p in payloads[:limit]]
+            k *= 4
+
+    def deduplicate(self, commit_hash: str) -> bool:
+        return bool(self.store.contains_many([commit_hash]))
+
+    def evaluate_recall(
+        self,
+        queries: List[str],
+        k: int = 10,
+        nprobe: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Recall@k of quantized/IVF vs exact search for these queries."""
+        return self.store.evaluate_recall(self._embed_many(queries), k, nprobe=nprobe)
+
+    def deduplicate_many(self, commit_hashes: List[str]) -> set:
+        return self.store.contains_many(commit_hashes)
+
+    def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Embed through the backend's cache, so a later commit reuses the vectors."""
+        return self._embed_many(texts)
+
+    def nearest_many(
+        self,
+        vectors: List[List[float]],
+        k: int = 3,
+        threshold: Optional[float] = None,
+    ) -> List[List[Tuple[float, Memory]]]:
+        """Top-``k`` stored neighbours (score, memory) of each vector."""
+        if not vectors or not len(self.store):
+            return [[] for _ in vectors]
+        out = []
+        for rows, scores in self.store.search(vectors, k):
+            keep = [i for i, score in enumerate(scores) if threshold is None or score >= threshold]
+            payloads = self.store.payloads([int(rows[i]) for i in keep])
+            out.append([(float(scores[i]), self._to_memory(p)) for i, p in zip(keep, payloads)])
+        return out
+
+    # NumPy releases the GIL for the heavy lifting, so the async variants
+    # run the sync paths in a thread.
+
+    async def acommit(self, memory: Memory) -> bool:
+        return await asyncio.to_thread(self.commit, memory)
+
+    async def acommit_many(self, memories: List[Memory]) -> List[bool]:
+        return await asyncio.to_thread(self.commit_many, memories)
+
+    async def asearch(
+        self,
+        query: str,
+        limit: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Memory]:
+        return await asyncio.to_thread(self.search, query, limit, filter)
+
+    async def asearch_many(
+        self,
+        queries: List[str],
+        limit: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Memory]]:
+        return await asyncio.to_thread(self.search_many, queries, limit, filter)
+
+    async def adeduplicate(self, commit_hash: str) -> bool:
+        return await asyncio.to_thread(self.deduplicate, commit_hash)
+
+    async def adeduplicate_many(self, commit_hashes: List[str]) -> set:
+        return await asyncio.to_thread(self.deduplicate_many, commit_hashes)
+
+    async def aembed_many(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self.embed_many, texts)
+
+    async def anearest_many(
+        self,
+        vectors: List[List[float]],
+        k: int = 3,
+        threshold: Optional[float] = None,
+    ) -> List[List[Tuple[float, Memory]]]:
+        return await asyncio.to_thread(self.nearest_many, vectors, k, threshold)
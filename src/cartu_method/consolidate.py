@@ -0,0 +1,279 @@
+"""
+Offline consolidation: stream a collection, find near-duplicate memories
+and delete all but the best representative of each.
+
+Usage:
+    python -m cartu_method.consolidate --url http://localhost:6333 \\
+        --collection agent_memory --checkpoint ~/.cache/cartu/consolidate.json
+
+or from code:
+    report = Consolidator(QdrantBackend(...), checkpoint_path="...").run()
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .rescue import Memory
+from .searchcache import bump_collection, collection_key
+
+
+def _rank_key(memory: Memory) -> Tuple[int, str, str]:
+    """Representative order: highest importance, then newest, then hash."""
+    return (memory.importance, memory.committed_at, memory.commit_hash)
+
+
+class Consolidator:
+    """
+    Streams a backend page by page (``scroll``) and deletes near-duplicates.
+
+    A memory is deleted when a near-duplicate — above ``threshold``
+    cosine — that ranks higher (importance, then recency) is certain to
+    survive. Candidates come from two places: the other memories in the
+    same block, compared with one pairwise matrix product, and each
+    memory's ``neighbors`` nearest stored neighbours (``nearest_many``),
+    which catches duplicates in other blocks without holding the
+    collection in memory. Chains (A near B, B near C, A not near C) keep
+    A, so every deletion leaves a survivor within the threshold.
+
+    Block size is the smaller of ``page_size`` and what fits in
+    ``max_memory_mb``. After each block the scroll offset and running
+    totals are written to ``checkpoint_path``, so an interrupted run
+    resumes where it stopped. ``dry_run`` reports without deleting.
+
+    Works with backends offering ``scroll``, ``delete_many`` and
+    ``nearest_many`` (Qdrant, Pinecone). Duplicates in other blocks are
+    only deleted when the backend also has ``fetch_vectors``. Requires
+    numpy (``pip install 'cartu-method[consolidate]'``).
+    """
+
+    def __init__(
+        self,
+        backend: Any,
+        threshold: float = 0.92,
+        neighbors: int = 5,
+        page_size: int = 1024,
+        max_memory_mb: float = 256.0,
+        checkpoint_path: Optional[str] = None,
+        dry_run: bool = False,
+    ):
+        for method in ("scroll", "delete_many", "nearest_many"):
+            if not hasattr(backend, method):
+                raise ValueError(f"{type(backend).__name__} does not support consolidation ({method})")
+        try:
+            from . import neardup
+        except ImportError:
+            raise ImportError("pip install 'cartu-method[consolidate]'")
+        self._neardup = neardup
+        self.backend = backend
+        self.threshold = threshold
+        self.neighbors = neighbors
+        self.dry_run = dry_run
+        self.checkpoint_path = os.path.expanduser(checkpoint_path) if checkpoint_path else None
+        self.block_size = self._block_size(page_size, max_memory_mb)
+
+    def _block_size(self, page_size: int, max_memory_mb: float) -> int:
+        """
+        Largest block within the memory cap: vectors arrive as Python float
+        lists (~32 bytes a component), plus payload text and the B x B
+        similarity matrix.
+        """
+        dimension = getattr(getattr(self.backend, "embedder", None), "dimension", 1536)
+        per_row = dimension * 36 + 4096
+        budget = max_memory_mb * (1 << 20)
+        block = page_size
+        while block > 16 and block * per_row + 5 * block * block > budget:
+            block //= 2
+        return block
+
+    # -- Checkpoint ---------------------------------------------------------
+
+    def _load_checkpoint(self) -> Dict[str, Any]:
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as f:
+                state = json.load(f)
+            if not state.get("done") and state.get("collection") == repr(collection_key(self.backend)):
+                return state
+        return {
+            "collection": repr(collection_key(self.backend)),
+            "offset": None,
+            "scanned": 0,
+            "deleted": 0,
+            "blocks": 0,
+            "elapsed_s": 0.0,
+            "done": False,
+        }
+
+    def _save_checkpoint(self, state: Dict[str, Any]) -> None:
+        if not self.checkpoint_path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.checkpoint_path)), exist_ok=True)
+        tmp = f"{self.checkpoint_path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.checkpoint_path)
+
+    # -- Run ----------------------------------------------------------------
+
+    def _doomed(self, memories: List[Memory], vectors: List[List[float]]) -> List[int]:
+        """
+        Indexes of block members to delete. Greedy, like
+        ``neardup.cluster_batch``: rows are visited best first, and a row is
+        deleted only when a representative that is certain to survive —
+        a kept row of this block, or a stored neighbour outranked by no
+        near-duplicate of its own — ranks higher and is above ``threshold``.
+        Every deleted row therefore keeps a survivor within the threshold.
+        """
+        n = len(memories)
+        ranks = [_rank_key(m) for m in memories]
+        # Best first; ties between exact copies broken by position
+        order = sorted(range(n), key=lambda i: (ranks[i], -i), reverse=True)
+
+        unit = self._neardup.normalize(vectors)
+        similar = (unit @ unit.T) >= self.threshold
+
+        # Higher-ranked near-duplicates stored outside this block
+        in_block = {m.commit_hash for m in memories}
+        outside: Dict[str, Memory] = {}
+        outranked_by: List[List[str]] = [[] for _ in range(n)]
+        neighbours = self.backend.nearest_many(vectors, self.neighbors + 1, self.threshold)
+        for i, near in enumerate(neighbours):
+            for _, other in near:
+                if other.commit_hash not in in_block and _rank_key(other) > ranks[i]:
+                    outside[other.commit_hash] = other
+                    outranked_by[i].append(other.commit_hash)
+        survivors = self._certain_survivors(outside)
+
+        kept: List[int] = []
+        doomed: List[int] = []
+        for i in order:
+            if any(h in survivors for h in outranked_by[i]) or (kept and similar[i, kept].any()):
+                doomed.append(i)
+            else:
+                kept.append(i)
+        return sorted(doomed)
+
+    def _certain_survivors(self, candidates: Dict[str, Memory]) -> set:
+        """
+        Hashes of stored memories that no run can delete: among their
+        near-duplicates none ranks higher. A neighbour list that came back
+        full may be cut short, so it proves nothing. Uses the stored vectors
+        (``fetch_vectors``), never re-embeds.
+        """
+        if not candidates or not hasattr(self.backend, "fetch_vectors"):
+            return set()
+        stored = self.backend.fetch_vectors(list(candidates))
+        memories = [m for h, m in candidates.items() if h in stored]
+        vectors = [stored[m.commit_hash] for m in memories]
+        k = self.neighbors + 1
+        survivors = set()
+        for memory, near in zip(memories, self.backend.nearest_many(vectors, k, self.threshold)):
+            if len(near) >= k:
+                continue
+            mine = _rank_key(memory)
+            if not any(
+                other.commit_hash != memory.commit_hash and _rank_key(other) > mine
+                for _, other in near
+            ):
+                survivors.add(memory.commit_hash)
+        return survivors
+
+    def run(self, max_blocks: Optional[int] = None) -> Dict[str, Any]:
+        """Consolidate (up to ``max_blocks`` more blocks); returns the report."""
+        state = self._load_checkpoint()
+        started = time.monotonic() - state["elapsed_s"]
+        blocks = 0
+        while max_blocks is None or blocks < max_blocks:
+            records, next_offset = self.backend.scroll(state["offset"], limit=self.block_size)
+            if records:
+                ids = [r[0] for r in records]
+                vectors = [r[1] for r in records]
+                memories = [r[2] for r in records]
+                doomed = self._doomed(memories, vectors)
+                if doomed and not self.dry_run:
+                    doomed_set = set(doomed)
+                    kept_hashes = {
+                        m.commit_hash for i, m in enumerate(memories) if i not in doomed_set
+                    }
+                    self.backend.delete_many(
+                        [ids[i] for i in doomed],
+                        [memories[i].commit_hash for i in doomed
+                         if memories[i].commit_hash not in kept_hashes],
+                    )
+                state["scanned"] += len(records)
+                state["deleted"] += len(doomed)
+            state["blocks"] += 1
+            state["offset"] = next_offset
+            state["done"] = next_offset is None
+            state["elapsed_s"] = time.monotonic() - started
+            self._save_checkpoint(state)
+            blocks += 1
+            if state["done"]:
+                break
+
+        if state["deleted"] and not self.dry_run:
+            bump_collection(collection_key(self.backend))
+        return self.report(state)
+
+    def report(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        scanned, deleted = state["scanned"], state["deleted"]
+        return {
+            "scanned": scanned,
+            "deleted": deleted,
+            "remaining": scanned - deleted,
+            "shrink_ratio": deleted / scanned if scanned else 0.0,
+            "blocks": state["blocks"],
+            "block_size": self.block_size,
+            "elapsed_s": state["elapsed_s"],
+            "done": state["done"],
+            "dry_run": self.dry_run,
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Merge near-duplicate memories in a collection.")
+    parser.add_argument("--backend", choices=["qdrant", "pinecone"], default="qdrant")
+    parser.add_argument("--url", default="http://localhost:6333", help="Qdrant URL")
+    parser.add_argument("--collection", default="agent_memory", help="Qdrant collection")
+    parser.add_argument("--index-name", default="agent-memory", help="Pinecone index")
+    parser.add_argument("--embedding-model", default="text-embedding-3-small")
+    parser.add_argument("--threshold", type=float, default=0.92)
+    parser.add_argument("--neighbors", type=int, default=5)
+    parser.add_argument("--page-size", type=int, default=1024)
+    parser.add_argument("--max-memory-mb", type=float, default=256.0)
+    parser.add_argument("--checkpoint", default=None, help="resume file")
+    parser.add_argument("--max-blocks", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    from .backends import PineconeBackend, QdrantBackend
+    if args.backend == "qdrant":
+        backend = QdrantBackend(
+            url=args.url,
+            collection=args.collection,
+            api_key=os.environ.get("QDRANT_API_KEY"),
+            embedding_model=args.embedding_model,
+            hybrid=False,
+        )
+    else:
+        backend = PineconeBackend(index_name=args.index_name)
+
+    try:
+        consolidator = Consolidator(
+            backend,
+            threshold=args.threshold,
+            neighbors=args.neighbors,
+            page_size=args.page_size,
+            max_memory_mb=args.max_memory_mb,
+            checkpoint_path=args.checkpoint,
+            dry_run=args.dry_run,
+        )
+    except ImportError as e:
+        parser.error(f"consolidation needs numpy: {e}")
+    print(json.dumps(consolidator.run(max_blocks=args.max_blocks), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Local dedup indexes so backends can answer "have we stored this?" without
+a network round trip.
+"""
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+import time
+from collections import OrderedDict
+from typing import Iterable
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _lock(fd: int) -> None:
+    """Exclusive lock on ``fd`` across processes (blocks until granted)."""
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return
+    os.lseek(fd, 0, os.SEEK_SET)
+    while True:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)  # gives up after ~10 s
+            return
+        except OSError:
+            continue
+
+
+def _unlock(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        return
+    os.lseek(fd, 0, os.SEEK_SET)
+    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class RecentHashes:
+    """Bounded set of recently confirmed commit hashes (LRU eviction)."""
+
+    def __init__(self, max_size: int = 100_000):
+        self.max_size = max_size
+        self._hashes: "OrderedDict[str, None]" = OrderedDict()
+
+    def __contains__(self, commit_hash: str) -> bool:
+        if commit_hash in self._hashes:
+            self._hashes.move_to_end(commit_hash)
+            return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def add(self, commit_hash: str) -> None:
+        self._hashes[commit_hash] = None
+        self._hashes.move_to_end(commit_hash)
+        if len(self._hashes) > self.max_size:
+            self._hashes.popitem(last=False)
+
+    def update(self, commit_hashes: Iterable[str]) -> None:
+        for h in commit_hashes:
+            self.add(h)
+
+
+class BloomDedupIndex:
+    """
+    Bloom filter over commit hashes in a memory-mapped file.
+
+    Opening an existing file is instant (the OS pages bits in on demand) and
+    every process mapping the same path sees the same filter; writers take
+    an exclusive file lock so concurrent adds don't lose bits.
+
+    A negative answer is exact only once the filter covers the whole
+    collection — ``complete`` records that, and is set by the owning
+    backend after a full warm-up scan (or when it creates an empty
+    collection). Positives may be false and need confirming upstream.
+
+    File layout: 32-byte header (magic, bit count, hash count, complete
+    flag, items added) followed by the bit array.
+    """
+
+    _MAGIC = b"CTBLOOM1"
+    _HEADER = struct.Struct("<8sQIIQ")
+
+    def __init__(
+        self,
+        path: str,
+        capacity: int = 2_000_000,
+        error_rate: float = 0.001,
+    ):
+        self.path = os.path.expanduser(path)
+        if not os.path.exists(self.path):
+            self._create(capacity, error_rate)
+        self._wait_for_header()
+
+        self._fd = os.open(self.path, os.O_RDWR | getattr(os, "O_BINARY", 0))
+        self._mm = mmap.mmap(self._fd, 0, access=mmap.ACCESS_WRITE)
+        magic, self.num_bits, self.num_hashes, _, _ = self._HEADER.unpack_from(self._mm, 0)
+        if magic != self._MAGIC:
+            raise ValueError(f"{self.path} is not a dedup index")
+
+    def _wait_for_header(self, timeout: float = 10.0) -> None:
+        """
+        Another process may still be creating the file: it is sized first
+        and the magic written last, so a zero magic means "not ready yet".
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with open(self.path, "rb") as f:
+                magic = f.read(len(self._MAGIC))
+            if len(magic) == len(self._MAGIC) and magic != bytes(len(self._MAGIC)):
+                return
+            time.sleep(0.01)
+
+    def _create(self, capacity: int, error_rate: float) -> None:
+        num_bits = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        num_bits += -num_bits % 8
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        try:
+            # O_EXCL: never clobber a file another process created (and may
+            # already have mapped) in the meantime
+            fd = os.open(
+                self.path,
+                os.O_RDWR | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0),
+                0o644,
+            )
+        except FileExistsError:
+            return
+        try:
+            os.ftruncate(fd, self._HEADER.size + num_bits // 8)
+            header = self._HEADER.pack(self._MAGIC, num_bits, num_hashes, 0, 0)
+            # Magic last: openers wait until it appears
+            os.lseek(fd, len(self._MAGIC), os.SEEK_SET)
+            os.write(fd, header[len(self._MAGIC):])
+            os.fsync(fd)
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.write(fd, header[:len(self._MAGIC)])
+        finally:
+            os.close(fd)
+
+    def _positions(self, commit_hash: str):
+        digest = hashlib.blake2b(commit_hash.encode(), digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def __contains__(self, commit_hash: str) -> bool:
+        mm = self._mm
+        base = self._HEADER.size
+        return all(
+            mm[base + (bit >> 3)] & (1 << (bit & 7))
+            for bit in self._positions(commit_hash)
+        )
+
+    def add_many(self, commit_hashes: Iterable[str]) -> None:
+        mm = self._mm
+        base = self._HEADER.size
+        added = 0
+        _lock(self._fd)
+        try:
+            for commit_hash in commit_hashes:
+                for bit in self._positions(commit_hash):
+                    mm[base + (bit >> 3)] |= 1 << (bit & 7)
+                added += 1
+            count = struct.unpack_from("<Q", mm, 24)[0]
+            struct.pack_into("<Q", mm, 24, count + added)
+        finally:
+            _unlock(self._fd)
+
+    def add(self, commit_hash: str) -> None:
+        self.add_many([commit_hash])
+
+    @property
+    def complete(self) -> bool:
+        return bool(struct.unpack_from("<I", self._mm, 20)[0])
+
+    @complete.setter
+    def complete(self, value: bool) -> None:
+        struct.pack_into("<I", self._mm, 20, int(value))
+
+    @property
+    def count(self) -> int:
+        return struct.unpack_from("<Q", self._mm, 24)[0]
+
+    def flush(self) -> None:
+        self._mm.flush()
+
+    def close(self) -> None:
+        if not self._mm.closed:
+            self._mm.flush()
+            self._mm.close()
+            os.close(self._fd)
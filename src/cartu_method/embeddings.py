@@ -0,0 +1,411 @@
+"""
+Embedding engines and the embedding cache shared by the vector backends.
+
+Backends take an ``Embedder``: ``OpenAIEmbedder`` calls a remote
+embeddings endpoint, ``LocalEmbedder`` runs a small sentence-embedding
+model on the CPU. Agents re-embed the same text constantly (repeated
+retrieval queries, re-extracted memories), so backends also look vectors
+up in an ``EmbeddingCache`` before calling the embedder.
+"""
+
+import asyncio
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+
+import httpx
+
+
+class Embedder(Protocol):
+    """Turns texts into vectors. ``model`` namespaces cache keys."""
+    model: str
+    dimension: int
+    def embed(self, texts: List[str]) -> List[List[float]]: ...
+    async def aembed(self, texts: List[str]) -> List[List[float]]: ...
+
+
+_OPENAI_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+
+class OpenAIEmbedder:
+    """Remote embeddings from an OpenAI-compatible ``/embeddings`` endpoint."""
+
+    def __init__(
+        self,
+        model: str = "text-embedding-3-small",
+        api_key: Optional[str] = None,
+        api_base: str = "https://api.openai.com/v1",
+        batch_size: int = 2048,
+        dimension: Optional[int] = None,
+    ):
+        self.model = model
+        self.api_key = api_key or os.environ.get("OPENAI_API_KEY", "")
+        self.api_base = api_base.rstrip("/")
+        self.batch_size = batch_size
+        self.dimension = dimension or _OPENAI_DIMENSIONS.get(model, 1536)
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """One request per ``batch_size`` texts."""
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), self.batch_size):
+            resp = httpx.post(
+                f"{self.api_base}/embeddings",
+                headers=self._headers(),
+                json={"model": self.model, "input": texts[start:start + self.batch_size]},
+                timeout=60,
+            )
+            resp.raise_for_status()
+            data = sorted(resp.json()["data"], key=lambda d: d["index"])
+            vectors.extend(d["embedding"] for d in data)
+        return vectors
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        vectors: List[List[float]] = []
+        async with httpx.AsyncClient(timeout=60) as client:
+            for start in range(0, len(texts), self.batch_size):
+                resp = await client.post(
+                    f"{self.api_base}/embeddings",
+                    headers=self._headers(),
+                    json={"model": self.model, "input": texts[start:start + self.batch_size]},
+                )
+                resp.raise_for_status()
+                data = sorted(resp.json()["data"], key=lambda d: d["index"])
+                vectors.extend(d["embedding"] for d in data)
+        return vectors
+
+
+class LocalEmbedder:
+    """
+    On-box CPU sentence embeddings with ONNX Runtime.
+
+    ``model_dir`` holds an ONNX export of a small sentence-embedding model
+    (e.g. all-MiniLM-L6-v2) as ``model.onnx`` plus its ``tokenizer.json``.
+    Outputs are mean-pooled over the attention mask and L2-normalised.
+
+    Calls from any number of threads or coroutines are coalesced by a
+    micro-batcher: requests arriving within ``max_wait_ms`` of each other
+    are run as one batch of up to ``max_batch_size`` texts, and batches
+    execute on a pool of ``num_workers`` threads (ONNX Runtime releases the
+    GIL). A warm-up batch at startup takes graph optimisation and memory
+    allocation off the first real request.
+
+    Requires: pip install onnxruntime tokenizers numpy
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+        num_workers: int = 2,
+        intra_op_threads: Optional[int] = None,
+        max_length: int = 256,
+        warmup: bool = True,
+    ):
+        try:
+            import numpy as np
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError:
+            raise ImportError("pip install onnxruntime tokenizers numpy")
+
+        self._np = np
+        model_dir = os.path.expanduser(model_dir)
+        self.model = f"local:{os.path.basename(os.path.normpath(model_dir))}"
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, "model.onnx"),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+        self._requests: "queue.Queue[Tuple[List[str], Future]]" = queue.Queue()
+        self._pool = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="cartu-embed")
+        self._batcher = threading.Thread(target=self._batch_loop, name="cartu-embed-batcher", daemon=True)
+        self._batcher.start()
+
+        self.dimension = len(self._run(["warm-up"])[0])
+        if warmup:
+            self._run(["warm-up"] * max_batch_size)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return self._submit(texts).result()
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.wrap_future(self._submit(texts))
+
+    def close(self) -> None:
+        self._requests.put(None)
+        self._batcher.join()
+        self._pool.shutdown()
+
+    def _submit(self, texts: List[str]) -> Future:
+        future: Future = Future()
+        if not texts:
+            future.set_result([])
+        else:
+            self._requests.put((list(texts), future))
+        return future
+
+    def _batch_loop(self) -> None:
+        """Coalesce queued requests into batches and hand them to the pool."""
+        pending: List[Tuple[List[str], Future]] = []
+        size = 0
+        while True:
+            timeout = self.max_wait if pending else None
+            try:
+                item = self._requests.get(timeout=timeout)
+            except queue.Empty:
+                item = ()  # Wait window closed — ship what we have
+            if item is None:
+                if pending:
+                    self._pool.submit(self._run_requests, pending)
+                return
+            if item:
+                pending.append(item)
+                size += len(item[0])
+            if pending and (not item or size >= self.max_batch_size):
+                self._pool.submit(self._run_requests, pending)
+                pending, size = [], 0
+
+    def _run_requests(self, requests: List[Tuple[List[str], Future]]) -> None:
+        texts = [t for req_texts, _ in requests for t in req_texts]
+        try:
+            vectors: List[List[float]] = []
+            for start in range(0, len(texts), self.max_batch_size):
+                vectors.extend(self._run(texts[start:start + self.max_batch_size]))
+        except Exception as e:
+            for _, future in requests:
+                future.set_exception(e)
+            return
+        offset = 0
+        for req_texts, future in requests:
+            future.set_result(vectors[offset:offset + len(req_texts)])
+            offset += len(req_texts)
+
+    def _run(self, texts: List[str]) -> List[List[float]]:
+        """Tokenize, run the model, mean-pool and normalise one batch."""
+        np = self._np
+        encodings = self.tokenizer.encode_batch(texts)
+        ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(ids)
+        hidden = self.session.run(None, feeds)[0]  # (batch, tokens, dim)
+        weights = mask[..., None].astype(np.float32)
+        pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.tolist()
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache keyed by (model, text hash).
+
+    An in-memory LRU answers hot lookups, holding each vector as packed
+    float32 (about 6 KB for 1536 dimensions); an optional SQLite file keeps
+    vectors across restarts and between processes, evicting the least
+    recently used rows once it grows past ``max_disk_bytes``. One instance
+    can be shared by several backends.
+
+    Usage:
+        cache = EmbeddingCache(path="~/.cache/cartu/embeddings.db")
+        qdrant = QdrantBackend(embedding_cache=cache)
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        path: Optional[str] = None,
+        max_disk_bytes: int = 1 << 30,
+    ):
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, array]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._disk_bytes = 0
+        if path:
+            path = os.path.expanduser(path)
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings(last_used)"
+            )
+            self._disk_bytes = self._db.execute(
+                "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()[0]
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\0{text}".encode()).hexdigest()
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """Look up vectors for ``texts``; ``None`` marks a miss."""
+        keys = [self.key(model, t) for t in texts]
+        found: List[Optional[List[float]]] = [None] * len(texts)
+        with self._lock:
+            missing = []
+            for i, k in enumerate(keys):
+                vector = self._memory.get(k)
+                if vector is not None:
+                    self._memory.move_to_end(k)
+                    found[i] = vector.tolist()
+                else:
+                    missing.append(i)
+
+            if missing and self._db is not None:
+                wanted = {keys[i] for i in missing}
+                rows = self._fetch_disk(list(wanted))
+                for i in missing:
+                    blob = rows.get(keys[i])
+                    if blob is not None:
+                        vector = array("f", blob)
+                        self._remember(keys[i], vector)
+                        found[i] = vector.tolist()
+                        self.disk_hits += 1
+
+            hit_count = sum(v is not None for v in found)
+            self.hits += hit_count
+            self.misses += len(texts) - hit_count
+        return found
+
+    def put_many(self, model: str, texts: List[str], vectors: List[List[float]]) -> None:
+        """Store freshly computed vectors in both tiers."""
+        keys = [self.key(model, t) for t in texts]
+        packed = [array("f", v) for v in vectors]
+        with self._lock:
+            for k, vector in zip(keys, packed):
+                self._remember(k, vector)
+            if self._db is not None:
+                now = time.time()
+                rows = [(k, v.tobytes(), now) for k, v in zip(keys, packed)]
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                    rows,
+                )
+                self._disk_bytes += sum(len(r[1]) for r in rows)
+                if self._disk_bytes > self.max_disk_bytes:
+                    self._evict_disk()
+
+    def embed(self, embedder: Embedder, texts: List[str]) -> List[List[float]]:
+        """Vectors for ``texts``, calling ``embedder`` only for cache misses."""
+        vectors = self.get_many(embedder.model, texts)
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            fresh = embedder.embed([texts[i] for i in missing])
+            self.put_many(embedder.model, [texts[i] for i in missing], fresh)
+            for i, vector in zip(missing, fresh):
+                vectors[i] = vector
+        return vectors
+
+    async def aembed(self, embedder: Embedder, texts: List[str]) -> List[List[float]]:
+        """Async ``embed``; SQLite reads and writes run off the event loop."""
+        if self._db is not None:
+            vectors = await asyncio.to_thread(self.get_many, embedder.model, texts)
+        else:
+            vectors = self.get_many(embedder.model, texts)
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            fresh = await embedder.aembed([texts[i] for i in missing])
+            if self._db is not None:
+                await asyncio.to_thread(self.put_many, embedder.model, [texts[i] for i in missing], fresh)
+            else:
+                self.put_many(embedder.model, [texts[i] for i in missing], fresh)
+            for i, vector in zip(missing, fresh):
+                vectors[i] = vector
+        return vectors
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_bytes": self._disk_bytes if self._db is not None else 0,
+        }
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _remember(self, key: str, vector: array) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _fetch_disk(self, keys: List[str]) -> Dict[str, bytes]:
+        rows: Dict[str, bytes] = {}
+        for start in range(0, len(keys), 500):  # stay under SQLite's variable limit
+            batch = keys[start:start + 500]
+            marks = ",".join("?" * len(batch))
+            rows.update(self._db.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", batch,
+            ).fetchall())
+        if rows:
+            now = time.time()
+            self._db.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(now, k) for k in rows],
+            )
+        return rows
+
+    def _evict_disk(self) -> None:
+        """Drop least recently used rows until the file is at 90% of its cap."""
+        target = int(self.max_disk_bytes * 0.9)
+        while self._disk_bytes > target:
+            rows = self._db.execute(
+                "SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_used LIMIT 1000"
+            ).fetchall()
+            if not rows:
+                self._disk_bytes = 0
+                break
+            doomed = []
+            for key, size in rows:
+                doomed.append((key,))
+                self._disk_bytes -= size
+                if self._disk_bytes <= target:
+                    break
+            self._db.executemany("DELETE FROM embeddings WHERE key = ?", doomed)
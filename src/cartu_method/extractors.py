@@ -3,13 +3,21 @@ Parallel extraction prompts — each perspective extracts different memory types
 Uses fast/cheap models (Cerebras, Groq, local) for extraction.
 """
 
+import asyncio
+import copy
 import json
 import os
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from contextlib import asynccontextmanager, contextmanager
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
 
 import httpx
 
+from .ratelimit import RateLimiter, rate_limiter, retry_after
 from .rescue import Memory
 
 
@@ -53,10 +61,287 @@ Focus on:
 
 Only return the JSON array, no other text."""
 
+# Shared by every perspective so requests for the same context start with
+# an identical prefix (system prompt + context) that providers can cache.
+EXTRACTION_SYSTEM = """You extract durable memories from an AI agent's conversation context before it is compacted. The context comes first; the instruction after it says which kind of memory to extract and the exact output format."""
+
+CONTINUE_PROMPT = """Your answer above was cut off at the output limit. Continue it: list only the items you had not listed yet, in the same JSON format, as a new complete JSON value. Only return the JSON, no other text."""
+
+COMBINED_HEADER = """Extract several kinds of memory from this conversation context in one pass. Return a single JSON object with the keys {keys}, each holding an array as described below. Use an empty array for a kind with nothing to extract."""
+
+COMBINED_FOOTER = """Only return the JSON object, no other text."""
+
+# Providers where the shared context is what costs: paid per input token, or
+# (Ollama) one local GPU that would prefill it once per perspective. Cerebras
+# is free and fast enough that three parallel calls win on latency.
+COMBINED_PROVIDERS = ("openai", "groq", "openrouter", "ollama")
+
+
+# Providers that take explicit cache breakpoints (``cache_control``) on
+# message parts; the others cache matching prefixes automatically.
+CACHE_MARKER_PROVIDERS = ("openrouter",)
+
+# Providers known to accept ``stream_options`` (usage in the final chunk)
+STREAM_USAGE_PROVIDERS = ("openai", "groq", "openrouter")
+
+
+def provider_of(model: str) -> str:
+    """Provider prefix of a model name ("openai" when there is none)."""
+    prefix = model.split("/", 1)[0] if "/" in model else ""
+    return prefix if prefix in ("cerebras", "groq", "ollama", "openrouter") else "openai"
+
+
+@dataclass
+class TokenUsage:
+    """Token counts summed over responses, from their ``usage`` blocks."""
+
+    requests: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+
+    def add(self, usage: Optional[Dict[str, Any]]) -> None:
+        usage = usage or {}
+        details = usage.get("prompt_tokens_details") or {}
+        self.requests += 1
+        self.prompt_tokens += int(usage.get("prompt_tokens") or 0)
+        self.completion_tokens += int(usage.get("completion_tokens") or 0)
+        # OpenAI-style details, or the Anthropic / DeepSeek field names
+        self.cached_tokens += int(
+            details.get("cached_tokens")
+            or usage.get("cache_read_input_tokens")
+            or usage.get("prompt_cache_hit_tokens")
+            or 0
+        )
+
+    def merge(self, other: "TokenUsage") -> None:
+        self.requests += other.requests
+        self.prompt_tokens += other.prompt_tokens
+        self.cached_tokens += other.cached_tokens
+        self.completion_tokens += other.completion_tokens
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cache_hit_rate": self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0,
+        }
+
+
+# Where requests made in the current context also report their usage
+_usage_sink: ContextVar[Optional[TokenUsage]] = ContextVar("cartu_usage_sink", default=None)
+
+
+@contextmanager
+def collect_usage() -> Iterator[TokenUsage]:
+    """
+    Sum the token usage of every extraction request made inside the block,
+    including tasks it starts (they inherit the context).
+    """
+    usage = TokenUsage()
+    token = _usage_sink.set(usage)
+    try:
+        yield usage
+    finally:
+        _usage_sink.reset(token)
+
+
+class JSONArrayStreamParser:
+    """
+    Incremental parser for a streamed JSON array of objects.
+
+    ``feed`` accepts arbitrary text fragments and returns every top-level
+    array element that completed within them. Anything before the opening
+    ``[`` (prose, a markdown fence) is skipped, and nothing after the
+    closing ``]`` is read. A ``[`` only opens the array when the next
+    non-space character is ``{`` or ``]``, so brackets in prose are skipped.
+    """
+
+    def __init__(self):
+        self.done = False          # closing ] seen
+        self._started = False      # opening [ seen
+        self._opening = False      # [ seen, not yet known to open the array
+        self._depth = 0            # nesting inside the current element
+        self._in_string = False
+        self._escape = False
+        self._buf: List[str] = []  # text of the element being read
+
+    @property
+    def truncated(self) -> bool:
+        """The array was opened but its input ended before it closed."""
+        return (self._started or self._opening) and not self.done
+
+    def feed(self, chunk: str) -> List[Any]:
+        items: List[Any] = []
+        for ch in chunk:
+            if self.done:
+                break
+            if not self._started:
+                if self._opening and not ch.isspace():
+                    self._opening = False
+                    self._started = ch in "{]"
+                if not self._started:
+                    self._opening = self._opening or ch == "["
+                    continue
+            if self._depth == 0:
+                # Between elements: only an object start or the array end
+                # matter, outside any non-object element's string
+                if self._in_string:
+                    if self._escape:
+                        self._escape = False
+                    elif ch == "\\":
+                        self._escape = True
+                    elif ch == '"':
+                        self._in_string = False
+                elif ch == '"':
+                    self._in_string = True
+                elif ch == "{":
+                    self._depth = 1
+                    self._buf = [ch]
+                elif ch == "]":
+                    self.done = True
+                continue
+
+            self._buf.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        items.append(json.loads("".join(self._buf)))
+                    except ValueError:
+                        pass  # Malformed element — skip it, keep going
+                    self._buf = []
+        return items
+
+
+class KeyedArrayStreamParser:
+    """
+    Incremental parser for a streamed JSON object of arrays, as returned by
+    ``CombinedExtractor``: ``{"facts": [...], "decisions": [...]}``.
+
+    ``feed`` returns ``(key, element)`` for every array element completed
+    within the chunk. Values that aren't arrays are skipped, nested objects
+    included; only the ``}`` closing the outer object ends the parse. A
+    ``{`` only opens the object when a ``"key":`` follows it, so braces in
+    prose are skipped.
+    """
+
+    def __init__(self):
+        self.done = False          # closing } seen
+        self._started = False      # opening { seen
+        self._opening: Optional[str] = None  # "brace", "key" or "colon" before that
+        self._key: Optional[str] = None
+        self._depth = 0            # nesting inside a skipped value
+        self._in_string = False
+        self._escape = False
+        self._buf: List[str] = []  # string being read at the top level
+        self._array: Optional[JSONArrayStreamParser] = None
+
+    @property
+    def truncated(self) -> bool:
+        opening = self._opening in ("key", "colon")
+        return (self._started or opening) and not self.done
+
+    def _open(self, ch: str) -> None:
+        """Look for ``{"key":``; on finding it the object is open at that key."""
+        if self._opening == "key":
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._opening = "colon"
+                return
+            self._buf.append(ch)
+        elif self._opening and ch.isspace():
+            pass
+        elif self._opening == "brace" and ch == '"':
+            self._opening = "key"
+            self._buf = []
+        elif self._opening == "colon" and ch == ":":
+            self._opening = None
+            self._started = True
+            self._key = "".join(self._buf)
+        else:
+            self._opening = "brace" if ch == "{" else None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        items: List[Tuple[str, Any]] = []
+        for ch in chunk:
+            if self.done:
+                break
+            if not self._started:
+                self._open(ch)
+                continue
+            if self._array is not None:
+                items.extend((self._key, item) for item in self._array.feed(ch))
+                if self._array.done:
+                    self._array = None
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 0 and self._key is None:
+                        self._key = "".join(self._buf)
+                    continue
+                if self._depth == 0:
+                    self._buf.append(ch)
+            elif ch == '"':
+                self._in_string = True
+                self._buf = []
+            elif self._depth > 0:
+                # Inside a skipped value: only track where it ends
+                if ch in "{[":
+                    self._depth += 1
+                elif ch in "}]":
+                    self._depth -= 1
+            elif ch == "[" and self._key is not None:
+                # Known to be an array, whatever its first element
+                self._array = JSONArrayStreamParser()
+                self._array._started = True
+            elif ch in "{[":
+                self._depth = 1
+            elif ch == ",":
+                self._key = None
+            elif ch == "}":
+                self.done = True
+        return items
+
+
+@asynccontextmanager
+async def _borrow_client(client: Optional[httpx.AsyncClient]):
+    """Yield the shared client if given, else a temporary one closed on exit."""
+    if client is not None:
+        yield client
+        return
+    async with httpx.AsyncClient(timeout=60.0) as temp:
+        yield temp
+
 
 class BaseExtractor(ABC):
     """Base class for memory extractors."""
 
+    max_tokens = 4096
+    max_retries = 4  # on 429, after waiting out Retry-After
+    max_continuations = 2  # follow-up requests when the output is cut off
+
     def __init__(
         self,
         model: str = "cerebras/llama-3.3-70b",
@@ -66,6 +351,9 @@ class BaseExtractor(ABC):
         self.model = model
         self.api_base = api_base or self._infer_api_base(model)
         self.api_key = api_key or self._infer_api_key(model)
+        self.provider = provider_of(model)
+        # Token usage over every request this extractor has made
+        self.usage = TokenUsage()
 
     @abstractmethod
     def get_prompt(self) -> str:
@@ -109,61 +397,282 @@ class BaseExtractor(ABC):
                 return parts[1]
         return model
 
-    async def extract(self, context: str) -> List[Memory]:
-        """Extract memories from context using the fast model."""
-        prompt = self.get_prompt()
-        category = self.get_category()
-
-        try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+
+    def _request_body(self, context: str) -> Dict[str, Any]:
+        """
+        Build the chat/completions payload for this perspective.
+
+        The shared system prompt and the context come first and are the
+        same for every perspective, so the perspective's own instruction,
+        last, is all that misses the provider's prefix cache.
+        """
+        shared = f"Context to extract from:\n\n{context}"
+        if self.provider in CACHE_MARKER_PROVIDERS:
+            # Explicit breakpoint: cache everything up to the end of the context
+            shared = [{"type": "text", "text": shared, "cache_control": {"type": "ephemeral"}}]
+        return {
+            "model": self._clean_model_name(self.model),
+            "messages": [
+                {"role": "system", "content": EXTRACTION_SYSTEM},
+                {"role": "user", "content": shared},
+                {"role": "user", "content": self.get_prompt()},
+            ],
+            "temperature": 0.2,
+            "max_tokens": self.max_tokens,
+        }
+
+    @property
+    def limiter(self) -> RateLimiter:
+        """The process-wide rate limiter for this provider and API key."""
+        return rate_limiter(self.provider, self.api_key)
+
+    def _estimate_tokens(self, body: Dict[str, Any]) -> int:
+        """Rough request cost for the tokens/min bucket: ~4 chars a token
+        of prompt, plus the full output allowance."""
+        chars = sum(len(json.dumps(m["content"])) for m in body["messages"])
+        return chars // 4 + body.get("max_tokens", 0)
+
+    async def _post(self, client: httpx.AsyncClient, body: Dict[str, Any], cost: int) -> httpx.Response:
+        """
+        POST through the rate limiter, retrying 429s after their Retry-After.
+        A failed attempt's token reservation is returned to the limiter.
+        """
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(cost)
+            try:
                 response = await client.post(
                     f"{self.api_base}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "model": self._clean_model_name(self.model),
-                        "messages": [
-                            {"role": "system", "content": prompt},
-                            {"role": "user", "content": f"Context to extract from:\n\n{context}"},
-                        ],
-                        "temperature": 0.2,
-                        "max_tokens": 4096,
-                    },
+                    headers=self._headers(),
+                    json=body,
                 )
+                if response.status_code == 429 and attempt < self.max_retries:
+                    self.limiter.settle(cost, 0)
+                    self.limiter.throttle(retry_after(response, attempt))
+                    continue
                 response.raise_for_status()
-                data = response.json()
-
-            text = data["choices"][0]["message"]["content"]
-            
-            # Parse JSON from response (handle markdown code blocks)
-            text = text.strip()
-            if text.startswith("```"):
-                text = text.split("\n", 1)[1] if "\n" in text else text[3:]
-                if text.endswith("```"):
-                    text = text[:-3]
-                text = text.strip()
-
-            items = json.loads(text)
-            
-            memories = []
-            for item in items:
-                if isinstance(item, dict) and "text" in item:
-                    memories.append(Memory(
-                        text=item["text"],
-                        category=category,
-                        importance=int(item.get("importance", 5)),
-                        metadata={
-                            "subcategory": item.get("subcategory", ""),
-                        },
-                    ))
-            return memories
-
-        except Exception as e:
+            except Exception:
+                self.limiter.settle(cost, 0)
+                raise
+            return response
+
+    @asynccontextmanager
+    async def _open_stream(self, client: httpx.AsyncClient, body: Dict[str, Any], cost: int):
+        """Streaming counterpart of ``_post``."""
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(cost)
+            opened = False
+            try:
+                async with client.stream(
+                    "POST",
+                    f"{self.api_base}/chat/completions",
+                    headers=self._headers(),
+                    json=body,
+                ) as response:
+                    if response.status_code == 429 and attempt < self.max_retries:
+                        self.limiter.settle(cost, 0)
+                        self.limiter.throttle(retry_after(response, attempt))
+                        continue
+                    response.raise_for_status()
+                    opened = True
+                    yield response
+                    return
+            except Exception:
+                # Once streaming has begun the tokens are being spent; the
+                # caller settles them against reported usage
+                if not opened:
+                    self.limiter.settle(cost, 0)
+                raise
+
+    def _record_usage(self, usage: Optional[Dict[str, Any]], estimated: Optional[int] = None) -> None:
+        self.usage.add(usage)
+        if usage and estimated is not None:
+            actual = usage.get("total_tokens") or (
+                (usage.get("prompt_tokens") or 0) + (usage.get("completion_tokens") or 0)
+            )
+            self.limiter.settle(estimated, actual or None)
+        sink = _usage_sink.get()
+        if sink is not None:
+            sink.add(usage)
+
+    def _to_memory(self, item: Any, category: Optional[str] = None) -> Optional[Memory]:
+        """Turn one parsed JSON item into a Memory, or None if malformed."""
+        if not (isinstance(item, dict) and "text" in item):
+            return None
+        try:
+            importance = int(item.get("importance", 5))
+        except (TypeError, ValueError):
+            importance = 5
+        return Memory(
+            text=item["text"],
+            category=category or self.get_category(),
+            importance=importance,
+            metadata={
+                "subcategory": item.get("subcategory", ""),
+            },
+        )
+
+    def _parse(self, text: str, finish_reason: Optional[str] = None) -> Tuple[List[Memory], bool]:
+        """
+        Memories from every complete element of a response — markdown
+        fences and prose around the JSON are skipped — and whether the
+        response was cut off before the JSON closed.
+        """
+        parser = self._stream_parser()
+        memories = [m for m in map(self._streamed_memory, parser.feed(text)) if m is not None]
+        return memories, parser.truncated or (finish_reason == "length" and not parser.done)
+
+    def _continuation(self, body: Dict[str, Any], partial: str) -> Dict[str, Any]:
+        """The request asking for what a cut-off response didn't get to."""
+        body = dict(body)
+        body["messages"] = body["messages"] + [
+            {"role": "assistant", "content": partial},
+            {"role": "user", "content": CONTINUE_PROMPT},
+        ]
+        return body
+
+    def _stream_parser(self) -> Any:
+        return JSONArrayStreamParser()
+
+    def _streamed_memory(self, item: Any) -> Optional[Memory]:
+        """Memory for one element returned by the stream parser."""
+        return self._to_memory(item)
+
+    async def extract(
+        self,
+        context: str,
+        client: Optional[httpx.AsyncClient] = None,
+    ) -> List[Memory]:
+        """
+        Extract memories from context using the fast model.
+
+        Pass a long-lived ``client`` to reuse pooled keep-alive connections;
+        without one, a throwaway client is opened for this call. Token
+        usage is added to ``self.usage`` (and to any ``collect_usage``).
+        """
+        try:
+            return await self._extract(context, client)
+        except Exception:
             # Don't crash on extraction failure — return empty
             return []
 
+    async def _extract(
+        self,
+        context: str,
+        client: Optional[httpx.AsyncClient] = None,
+    ) -> List[Memory]:
+        """``extract`` without the safety net: failures raise."""
+        body = self._request_body(context)
+        memories: List[Memory] = []
+        async with _borrow_client(client) as client:
+            for attempt in range(self.max_continuations + 1):
+                cost = self._estimate_tokens(body)
+                response = await self._post(client, body, cost)
+                data = response.json()
+                self._record_usage(data.get("usage"), cost)
+
+                choice = data["choices"][0]
+                text = choice["message"]["content"]
+                found, truncated = self._parse(text, choice.get("finish_reason"))
+                memories.extend(found)
+                if not truncated:
+                    break
+                # Cut off mid-JSON: keep the complete items, ask for the rest
+                body = self._continuation(body, text)
+        return memories
+
+    def with_model(
+        self,
+        model: str,
+        api_base: Optional[str] = None,
+        api_key: Optional[str] = None,
+    ) -> "BaseExtractor":
+        """The same perspective, sent to a different model/provider."""
+        clone = copy.copy(self)
+        clone.model = model
+        clone.api_base = api_base or self._infer_api_base(model)
+        clone.api_key = api_key or self._infer_api_key(model)
+        clone.provider = provider_of(model)
+        clone.usage = TokenUsage()
+        return clone
+
+    async def stream(
+        self,
+        context: str,
+        client: Optional[httpx.AsyncClient] = None,
+    ) -> AsyncIterator[Memory]:
+        """
+        Streaming extraction: consume the SSE token stream and yield each
+        Memory as soon as its object closes, while generation continues.
+
+        Like ``extract``, failures end the stream quietly; memories already
+        yielded stand.
+        """
+        try:
+            async for mem in self._stream(context, client):
+                yield mem
+        except Exception:
+            # Don't crash on extraction failure — end the stream
+            return
+
+    async def _stream(
+        self,
+        context: str,
+        client: Optional[httpx.AsyncClient] = None,
+    ) -> AsyncIterator[Memory]:
+        """``stream`` without the safety net: failures raise."""
+        body = self._request_body(context)
+        body["stream"] = True
+        want_usage = self.provider in STREAM_USAGE_PROVIDERS
+        if want_usage:
+            body["stream_options"] = {"include_usage": True}
+
+        async with _borrow_client(client) as client:
+            for attempt in range(self.max_continuations + 1):
+                parser = self._stream_parser()
+                cost = self._estimate_tokens(body)
+                reported: Optional[Dict[str, Any]] = None
+                finish_reason: Optional[str] = None
+                text: List[str] = []
+                try:
+                    async with self._open_stream(client, body, cost) as response:
+                        async for line in response.aiter_lines():
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[5:].strip()
+                            if data == "[DONE]":
+                                break
+                            chunk = json.loads(data)
+                            reported = chunk.get("usage") or reported
+                            choices = chunk.get("choices") or []
+                            if parser.done:
+                                # Only waiting for the trailing usage chunk
+                                if reported is not None or not want_usage:
+                                    break
+                                continue
+                            if not choices:
+                                continue
+                            finish_reason = choices[0].get("finish_reason") or finish_reason
+                            delta = (choices[0].get("delta") or {}).get("content") or ""
+                            text.append(delta)
+                            for item in parser.feed(delta):
+                                mem = self._streamed_memory(item)
+                                if mem is not None:
+                                    yield mem
+                            if parser.done and (reported is not None or not want_usage):
+                                break
+                finally:
+                    self._record_usage(reported, cost)
+
+                if not (parser.truncated or (finish_reason == "length" and not parser.done)):
+                    break
+                # Cut off mid-JSON: ask for the rest
+                body = self._continuation(body, "".join(text))
+
 
 class FactExtractor(BaseExtractor):
     def get_prompt(self) -> str:
@@ -184,3 +693,174 @@ class SkillExtractor(BaseExtractor):
         return SKILL_PROMPT
     def get_category(self) -> str:
         return "skill"
+
+
+class CombinedExtractor(BaseExtractor):
+    """
+    Every perspective in one request: the model returns an object of keyed
+    arrays (``{"facts": [...], "decisions": [...], "skills": [...]}``), each
+    parsed into its perspective's category.
+
+    The context is sent, and billed, once instead of once per perspective,
+    at the cost of one longer generation instead of parallel ones.
+    """
+
+    max_tokens = 8192
+
+    def __init__(
+        self,
+        model: str = "cerebras/llama-3.3-70b",
+        api_base: Optional[str] = None,
+        api_key: Optional[str] = None,
+        perspectives: Optional[Sequence[BaseExtractor]] = None,
+    ):
+        super().__init__(model=model, api_base=api_base, api_key=api_key)
+        if perspectives is None:
+            perspectives = [
+                FactExtractor(model=model, api_base=api_base, api_key=api_key),
+                DecisionExtractor(model=model, api_base=api_base, api_key=api_key),
+                SkillExtractor(model=model, api_base=api_base, api_key=api_key),
+            ]
+        self.perspectives = list(perspectives)
+        # Response key -> category: "facts" -> "fact"
+        self.keys: Dict[str, str] = {
+            f"{p.get_category()}s": p.get_category() for p in self.perspectives
+        }
+
+    def get_prompt(self) -> str:
+        sections = [COMBINED_HEADER.format(keys=", ".join(f'"{k}"' for k in self.keys))]
+        for key, perspective in zip(self.keys, self.perspectives):
+            prompt = perspective.get_prompt().strip()
+            # Each perspective ends by asking for a bare array; the object replaces it
+            prompt = prompt.rsplit("\n\nOnly return the JSON array", 1)[0]
+            sections.append(f'"{key}":\n{prompt}')
+        sections.append(COMBINED_FOOTER)
+        return "\n\n".join(sections)
+
+    def get_category(self) -> str:
+        return "combined"
+
+    def _stream_parser(self) -> Any:
+        return KeyedArrayStreamParser()
+
+    def _streamed_memory(self, item: Any) -> Optional[Memory]:
+        key, element = item
+        category = self.keys.get(key)
+        return self._to_memory(element, category) if category else None
+
+
+class HedgedExtractor(BaseExtractor):
+    """
+    Wraps an extractor with a hedge: if the ``primary`` hasn't answered
+    within the ``percentile`` of its recent latencies, the same extraction
+    goes to ``secondary`` (usually another provider) as well. The first
+    successful answer wins and the other request is cancelled; a primary
+    that fails outright is hedged at once.
+
+    Until ``min_samples`` latencies are known the hedge fires after
+    ``initial_delay`` seconds. ``stats()`` reports how often requests were
+    hedged and how often the hedge won. Streaming is not hedged.
+    """
+
+    def __init__(
+        self,
+        primary: BaseExtractor,
+        secondary: BaseExtractor,
+        percentile: float = 0.95,
+        window: int = 200,
+        min_samples: int = 20,
+        initial_delay: float = 10.0,
+    ):
+        super().__init__(model=primary.model, api_base=primary.api_base, api_key=primary.api_key)
+        self.primary = primary
+        self.secondary = secondary
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self._latencies: deque = deque(maxlen=window)
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def get_prompt(self) -> str:
+        return self.primary.get_prompt()
+
+    def get_category(self) -> str:
+        return self.primary.get_category()
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait on the primary before hedging."""
+        if len(self._latencies) < self.min_samples:
+            return self.initial_delay
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))]
+
+    async def _extract(
+        self,
+        context: str,
+        client: Optional[httpx.AsyncClient] = None,
+    ) -> List[Memory]:
+        self.requests += 1
+        started = time.monotonic()
+        primary = asyncio.create_task(self.primary._extract(context, client))
+        tasks = [primary]
+        try:
+            await asyncio.wait(tasks, timeout=self.hedge_delay())
+            if primary.done() and primary.exception() is None:
+                self._latencies.append(time.monotonic() - started)
+                return self._tagged(primary.result(), self.primary)
+
+            # Slow (or already failed): send the same request to the secondary
+            self.hedged += 1
+            tasks.append(asyncio.create_task(self.secondary._extract(context, client)))
+            pending = {t for t in tasks if not t.done()}
+            error: Optional[BaseException] = primary.exception() if primary.done() else None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=tasks.index):  # primary first on a tie
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    if task is primary:
+                        self._latencies.append(time.monotonic() - started)
+                        return self._tagged(task.result(), self.primary)
+                    self.hedge_wins += 1
+                    return self._tagged(task.result(), self.secondary)
+            raise error  # both failed
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            if not primary.done() or primary.cancelled():
+                # Lost to the hedge: its latency is at least this much
+                self._latencies.append(time.monotonic() - started)
+
+    @staticmethod
+    def _tagged(memories: List[Memory], source: BaseExtractor) -> List[Memory]:
+        for mem in memories:
+            mem.extraction_model = source.model
+        return memories
+
+    def stream(
+        self,
+        context: str,
+        client: Optional[httpx.AsyncClient] = None,
+    ) -> AsyncIterator[Memory]:
+        return self.primary.stream(context, client=client)
+
+    def _stream(
+        self,
+        context: str,
+        client: Optional[httpx.AsyncClient] = None,
+    ) -> AsyncIterator[Memory]:
+        return self.primary._stream(context, client)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_rate": self.hedged / self.requests if self.requests else 0.0,
+            "hedge_wins": self.hedge_wins,
+            "win_rate": self.hedge_wins / self.hedged if self.hedged else 0.0,
+            "hedge_delay_s": self.hedge_delay(),
+        }
@@ -0,0 +1,124 @@
+"""
+Search filters and their translation to each backend's native syntax.
+
+A filter is a dict of payload field -> condition, all of which must hold:
+
+    {"category": "decision"}                          # equals
+    {"category": ["decision", "skill"]}               # any of
+    {"importance": {"gte": 8}}                        # range: gt / gte / lt / lte
+    {"committed_at": {"gte": datetime.now(timezone.utc) - timedelta(days=7)}}
+
+``committed_at`` bounds may be datetimes, ISO-8601 strings or epoch
+seconds. Backends whose filters only do numeric ranges (Pinecone, Chroma)
+store a ``committed_ts`` epoch alongside ``committed_at`` and are queried
+on that.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+RANGE_OPS = ("gt", "gte", "lt", "lte")
+
+
+def to_timestamp(value: Any) -> float:
+    """Epoch seconds for a datetime, ISO-8601 string or number."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def to_isoformat(value: Any) -> str:
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=timezone.utc).isoformat()
+    if isinstance(value, str):
+        return value
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.isoformat()
+
+
+def conditions(filter: Optional[Dict[str, Any]]) -> List[Tuple[str, str, Any]]:
+    """Flatten a filter to (field, op, value) with op in eq / in / a range op."""
+    out: List[Tuple[str, str, Any]] = []
+    for key, cond in (filter or {}).items():
+        if isinstance(cond, dict):
+            unknown = set(cond) - set(RANGE_OPS)
+            if unknown:
+                raise ValueError(f"unsupported filter operators for {key!r}: {sorted(unknown)}")
+            out.extend((key, op, value) for op, value in cond.items())
+        elif isinstance(cond, (list, tuple, set)):
+            out.append((key, "in", list(cond)))
+        else:
+            out.append((key, "eq", cond))
+    return out
+
+
+def matches(payload: Dict[str, Any], filter: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a filter against a payload client-side."""
+    for key, op, value in conditions(filter):
+        actual = payload.get(key)
+        if op == "eq":
+            ok = actual == value
+        elif op == "in":
+            ok = actual in value
+        else:
+            if actual is None or actual == "":
+                return False
+            if key == "committed_at":
+                actual, value = to_timestamp(actual), to_timestamp(value)
+            ok = {
+                "gt": actual > value, "gte": actual >= value,
+                "lt": actual < value, "lte": actual <= value,
+            }[op]
+        if not ok:
+            return False
+    return True
+
+
+def to_qdrant(filter: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Qdrant ``filter`` object (datetime ranges use RFC 3339 strings)."""
+    must: List[Dict[str, Any]] = []
+    ranges: Dict[str, Dict[str, Any]] = {}
+    for key, op, value in conditions(filter):
+        if op == "eq":
+            must.append({"key": key, "match": {"value": value}})
+        elif op == "in":
+            must.append({"key": key, "match": {"any": value}})
+        else:
+            ranges.setdefault(key, {})[op] = (
+                to_isoformat(value) if key == "committed_at" else value
+            )
+    must.extend({"key": key, "range": bounds} for key, bounds in ranges.items())
+    return {"must": must} if must else None
+
+
+def _numeric_field(key: str, value: Any) -> Tuple[str, Any]:
+    if key == "committed_at":
+        return "committed_ts", to_timestamp(value)
+    return key, value
+
+
+def to_pinecone(filter: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Pinecone metadata filter (MongoDB-style operators)."""
+    out: Dict[str, Dict[str, Any]] = {}
+    for key, op, value in conditions(filter):
+        if op in RANGE_OPS:
+            key, value = _numeric_field(key, value)
+        out.setdefault(key, {})[f"${op}"] = value
+    return out or None
+
+
+def to_chroma(filter: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Chroma ``where`` clause; one operator per clause, joined with ``$and``."""
+    clauses: List[Dict[str, Any]] = []
+    for key, op, value in conditions(filter):
+        if op in RANGE_OPS:
+            key, value = _numeric_field(key, value)
+        clauses.append({key: {f"${op}": value}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
@@ -0,0 +1,224 @@
+"""
+Lexical (BM25) index over memory text, and reciprocal-rank fusion for
+combining it with vector search.
+
+Dense embeddings are weakest on exact values — ports, IPs, paths, version
+strings — which is much of what rescue exists to save. The tokenizer keeps
+such tokens whole (``192.168.1.142``, ``localhost:8889``) and also indexes
+their parts, so both the full value and a fragment of it match.
+"""
+
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+_TOKEN = re.compile(r"[a-z0-9_]+(?:[.:/\-@][a-z0-9_]+)*")
+_PART = re.compile(r"[a-z0-9]+")
+_EXACT = re.compile(r"\d|[.:/\-@_]")
+
+# Common words that carry no signal on their own
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it of on or that the "
+    "this to was were will with".split()
+)
+
+
+def tokenize(text: str, parts: bool = True) -> List[str]:
+    """
+    Lowercased terms of ``text``. Compound tokens are kept whole; with
+    ``parts`` their alphanumeric pieces are emitted too (used for documents).
+    """
+    terms: List[str] = []
+    for token in _TOKEN.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        terms.append(token)
+        if parts and _EXACT.search(token) and not token.isdigit():
+            terms.extend(p for p in _PART.findall(token) if p != token)
+    return terms
+
+
+def is_exact_token(term: str) -> bool:
+    """True for identifier-like terms (contain a digit or punctuation)."""
+    return bool(_EXACT.search(term))
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[str]:
+    """
+    Fuse ranked lists of ids: score(id) = sum over lists of 1 / (k + rank).
+    Returns ids best first; ties keep first-seen order.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda key: -scores[key])
+
+
+class BM25Index:
+    """
+    Incremental BM25 inverted index in SQLite, keyed by commit hash.
+
+    Documents are added as they are committed (``add_many``) and keep their
+    payload, so lexical hits can be returned without a round trip to the
+    vector store. With no ``path`` the index lives in memory.
+
+    Like the dedup Bloom filter, the index only knows what was added to it:
+    ``complete`` records that it covers the whole collection (set by the
+    owning backend on creation or after a warm-up scan), which is what
+    makes lexical-only answers safe.
+    """
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        if path:
+            path = os.path.expanduser(path)
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path or ":memory:", check_same_thread=False, isolation_level=None)
+        if path:
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            " doc_id INTEGER PRIMARY KEY, commit_hash TEXT UNIQUE NOT NULL,"
+            " length INTEGER NOT NULL, payload TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " term TEXT NOT NULL, doc_id INTEGER NOT NULL, tf INTEGER NOT NULL,"
+            " PRIMARY KEY (term, doc_id)) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+        )
+        self._docs, self._total_length = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs"
+        ).fetchone()
+
+    def __len__(self) -> int:
+        return self._docs
+
+    @property
+    def complete(self) -> bool:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'complete'").fetchone()
+        return bool(row and row[0] == "1")
+
+    @complete.setter
+    def complete(self, value: bool) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('complete', ?)",
+                ("1" if value else "0",),
+            )
+
+    def add_many(self, payloads: Iterable[Dict[str, Any]]) -> int:
+        """Index payloads (need ``text`` and ``commit_hash``); returns how many were new."""
+        added = 0
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                for payload in payloads:
+                    terms = Counter(tokenize(payload.get("text", "")))
+                    length = sum(terms.values())
+                    cur = self._db.execute(
+                        "INSERT OR IGNORE INTO docs (commit_hash, length, payload) VALUES (?, ?, ?)",
+                        (payload["commit_hash"], length, json.dumps(payload, ensure_ascii=False)),
+                    )
+                    if not cur.rowcount:
+                        continue  # already indexed
+                    self._db.executemany(
+                        "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                        [(term, cur.lastrowid, tf) for term, tf in terms.items()],
+                    )
+                    added += 1
+                    self._docs += 1
+                    self._total_length += length
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return added
+
+    def remove_many(self, commit_hashes: Iterable[str]) -> int:
+        """Drop documents by commit hash; returns how many were removed."""
+        removed = 0
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                for commit_hash in commit_hashes:
+                    row = self._db.execute(
+                        "SELECT doc_id, length, payload FROM docs WHERE commit_hash = ?",
+                        (commit_hash,),
+                    ).fetchone()
+                    if row is None:
+                        continue
+                    doc_id, length, payload = row
+                    # Postings are keyed (term, doc_id): re-tokenize to find them
+                    terms = set(tokenize(json.loads(payload).get("text", "")))
+                    self._db.executemany(
+                        "DELETE FROM postings WHERE term = ? AND doc_id = ?",
+                        [(term, doc_id) for term in terms],
+                    )
+                    self._db.execute("DELETE FROM docs WHERE doc_id = ?", (doc_id,))
+                    removed += 1
+                    self._docs -= 1
+                    self._total_length -= length
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return removed
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[Dict[str, Any], float, bool]]:
+        """
+        Top-``limit`` documents by BM25 for ``query``:
+        [(payload, score, matches_every_query_term)], best first.
+        """
+        terms = list(dict.fromkeys(tokenize(query, parts=False)))
+        if not terms or not self._docs:
+            return []
+        with self._lock:
+            n = self._docs
+            avg_length = self._total_length / n
+            scores: Dict[int, float] = {}
+            matched: Counter = Counter()
+            for term in terms:
+                postings = self._db.execute(
+                    "SELECT p.doc_id, p.tf, d.length FROM postings p"
+                    " JOIN docs d ON d.doc_id = p.doc_id WHERE p.term = ?",
+                    (term,),
+                ).fetchall()
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                for doc_id, tf, length in postings:
+                    norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+                    matched[doc_id] += 1
+
+            top = sorted(scores, key=lambda d: -scores[d])[:limit]
+            if not top:
+                return []
+            placeholders = ",".join("?" * len(top))
+            payloads = dict(self._db.execute(
+                f"SELECT doc_id, payload FROM docs WHERE doc_id IN ({placeholders})", top,
+            ).fetchall())
+        return [
+            (json.loads(payloads[d]), scores[d], matched[d] == len(terms))
+            for d in top
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": self._docs,
+            "avg_length": self._total_length / self._docs if self._docs else 0.0,
+            "complete": self.complete,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,59 @@
+"""
+Semantic near-duplicate suppression.
+
+``commit_hash`` only catches identical text; extractors routinely phrase
+the same fact slightly differently. These helpers cluster memories whose
+embeddings are closer than a cosine threshold.
+"""
+
+from typing import Any, List, Sequence
+
+import numpy as np
+
+from .rescue import Memory
+
+
+def normalize(vectors: Any) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.clip(norms, 1e-12, None)
+
+
+def cluster_batch(memories: Sequence[Memory], vectors: Any, threshold: float) -> List[List[int]]:
+    """
+    Group a batch into near-duplicate clusters with one pairwise cosine
+    matrix product. Memories are visited by importance (highest first,
+    then newest); each unclaimed one becomes a representative and claims
+    every unclaimed memory above ``threshold``. Returns clusters as index
+    lists, representative first.
+    """
+    if not len(memories):
+        return []
+    unit = normalize(vectors)
+    similar = (unit @ unit.T) >= threshold
+    order = sorted(
+        range(len(memories)),
+        key=lambda i: (memories[i].importance, memories[i].committed_at),
+        reverse=True,
+    )
+    claimed = np.zeros(len(memories), dtype=bool)
+    clusters: List[List[int]] = []
+    for i in order:
+        if claimed[i]:
+            continue
+        members = np.flatnonzero(similar[i] & ~claimed)
+        claimed[members] = True
+        clusters.append([i] + [int(j) for j in members if j != i])
+    return clusters
+
+
+def merge(representative: Memory, duplicates: Sequence[Memory]) -> Memory:
+    """Fold duplicates into the representative: highest importance wins and
+    the variants' hashes are recorded in metadata."""
+    if duplicates:
+        representative.importance = max(
+            [representative.importance] + [m.importance for m in duplicates]
+        )
+        merged = representative.metadata.setdefault("merged_hashes", [])
+        merged.extend(m.commit_hash for m in duplicates)
+    return representative
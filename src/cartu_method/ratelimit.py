@@ -0,0 +1,220 @@
+"""
+Process-wide rate limiting for extraction requests.
+
+Every engine in the process that talks to the same provider with the same
+API key shares one ``RateLimiter``, so concurrent compactions queue behind
+each other instead of all drawing 429s. Limits are token buckets for
+requests/min and tokens/min; a 429 pauses the whole key for its
+``Retry-After``.
+"""
+
+import asyncio
+import hashlib
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+
+class _Bucket:
+    """
+    Token bucket holding up to one minute's allowance. Reservations may
+    overdraw it; the debt is the queue, paid off at the refill rate.
+    """
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def set_rate(self, per_minute: float, now: float) -> None:
+        """Change the limit, keeping the current level (and any debt)."""
+        self._refill(now)
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.level = min(self.capacity, self.level)
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take ``amount``; returns the seconds until it is actually available."""
+        self._refill(now)
+        self.level -= amount
+        return max(0.0, -self.level / self.rate)
+
+    def refund(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """
+    Requests/min and tokens/min limits for one provider + API key.
+
+    ``acquire`` reserves capacity and sleeps until it is available;
+    reservations are served in order. Token costs are estimates made
+    before sending — ``settle`` refunds the difference once the response
+    reports actual usage. ``throttle`` pauses every caller after a 429,
+    with up to ``jitter`` seconds of random spread on resume.
+
+    With no limits configured the limiter only enforces 429 pauses.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        jitter: float = 1.0,
+        name: str = "",
+    ):
+        self.name = name
+        self.jitter = jitter
+        self._lock = threading.Lock()
+        self._requests: Optional[_Bucket] = None
+        self._tokens: Optional[_Bucket] = None
+        self._blocked_until = 0.0
+        self.requests_per_minute: Optional[float] = None
+        self.tokens_per_minute: Optional[float] = None
+        self.configure(requests_per_minute, tokens_per_minute)
+        self.acquired = 0
+        self.delayed = 0
+        self.wait_s = 0.0
+        self.max_wait_s = 0.0
+        self.throttled = 0
+
+    def configure(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ) -> None:
+        """
+        Set the limits that are given; a limit left as None is unchanged.
+        Changing a limit keeps the bucket's level, so queued reservations
+        are still paid off.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if requests_per_minute:
+                self.requests_per_minute = requests_per_minute
+                self._requests = self._rebucket(self._requests, requests_per_minute, now)
+            if tokens_per_minute:
+                self.tokens_per_minute = tokens_per_minute
+                self._tokens = self._rebucket(self._tokens, tokens_per_minute, now)
+
+    @staticmethod
+    def _rebucket(bucket: Optional[_Bucket], per_minute: float, now: float) -> _Bucket:
+        if bucket is None:
+            return _Bucket(per_minute)
+        bucket.set_rate(per_minute, now)
+        return bucket
+
+    def reserve(self, tokens: float = 0.0) -> float:
+        """Reserve one request of ``tokens``; returns how long to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            wait = 0.0
+            if self._requests is not None:
+                wait = max(wait, self._requests.reserve(1, now))
+            if self._tokens is not None and tokens:
+                wait = max(wait, self._tokens.reserve(tokens, now))
+            if self._blocked_until > now:
+                wait = max(wait, self._blocked_until - now + random.uniform(0, self.jitter))
+            self.acquired += 1
+            if wait > 0:
+                self.delayed += 1
+                self.wait_s += wait
+                self.max_wait_s = max(self.max_wait_s, wait)
+            return wait
+
+    async def acquire(self, tokens: float = 0.0) -> float:
+        """Wait for capacity for one request of ``tokens``; returns the delay."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def settle(self, estimated: float, actual: Optional[float]) -> None:
+        """Return the over-estimate of a request's tokens to the bucket."""
+        if actual is None or self._tokens is None or actual >= estimated:
+            return
+        with self._lock:
+            self._tokens.refund(estimated - actual, time.monotonic())
+
+    def throttle(self, delay: float) -> None:
+        """Pause every caller for ``delay`` seconds (a 429 was received)."""
+        with self._lock:
+            self.throttled += 1
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+            "acquired": self.acquired,
+            "delayed": self.delayed,
+            "throttled": self.throttled,
+            "queue_wait_s": self.wait_s,
+            "avg_queue_wait_s": self.wait_s / self.acquired if self.acquired else 0.0,
+            "max_queue_wait_s": self.max_wait_s,
+        }
+
+
+# (provider, API key digest) -> limiter, shared by the whole process
+_limiters: Dict[Tuple[str, str], RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _key(provider: str, api_key: str) -> Tuple[str, str]:
+    return provider, hashlib.sha256((api_key or "").encode()).hexdigest()[:16]
+
+
+def rate_limiter(provider: str, api_key: str) -> RateLimiter:
+    """The process-wide limiter for ``provider`` and ``api_key``."""
+    key = _key(provider, api_key)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            # Named provider:key-digest, never the key itself
+            limiter = _limiters[key] = RateLimiter(name=f"{key[0]}:{key[1][:8]}")
+        return limiter
+
+
+def configure_rate_limit(
+    provider: str,
+    api_key: str,
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+) -> RateLimiter:
+    """
+    Set the given limits for ``provider`` and ``api_key``, leaving the
+    others as they are; returns the limiter.
+    """
+    limiter = rate_limiter(provider, api_key)
+    limiter.configure(requests_per_minute, tokens_per_minute)
+    return limiter
+
+
+def retry_after(response: httpx.Response, attempt: int) -> float:
+    """
+    Seconds to wait before retrying a 429: ``Retry-After`` (seconds or an
+    HTTP date) or ``retry-after-ms`` when present, else exponential backoff.
+    """
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return max(0.0, float(headers["retry-after-ms"]) / 1000.0)
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        pass
+    return min(60.0, 2.0 ** attempt)
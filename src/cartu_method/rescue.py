@@ -4,19 +4,14 @@ extracts durable memories using parallel fast-inference calls.
 """
 
 import asyncio
+import functools
 import hashlib
-import json
 import time
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Protocol
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Protocol, Tuple, Union
 
-from .extractors import (
-    BaseExtractor,
-    DecisionExtractor,
-    FactExtractor,
-    SkillExtractor,
-)
+import httpx
 
 
 @dataclass
@@ -42,8 +37,85 @@ class Memory:
 class VectorBackend(Protocol):
     """Protocol for vector database backends."""
     def commit(self, memory: Memory) -> bool: ...
-    def search(self, query: str, limit: int = 5) -> List[Memory]: ...
+    def search(self, query: str, limit: int = 5, filter: Optional[Dict[str, Any]] = None) -> List[Memory]: ...
     def deduplicate(self, commit_hash: str) -> bool: ...
+    def commit_many(self, memories: List[Memory]) -> List[bool]: ...
+    def deduplicate_many(self, commit_hashes: List[str]) -> set: ...
+    def search_many(
+        self, queries: List[str], limit: int = 5, filter: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Memory]]: ...
+
+
+class AsyncVectorBackend(VectorBackend, Protocol):
+    """Backend that also offers non-blocking variants of every operation."""
+    async def acommit(self, memory: Memory) -> bool: ...
+    async def acommit_many(self, memories: List[Memory]) -> List[bool]: ...
+    async def asearch(
+        self, query: str, limit: int = 5, filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Memory]: ...
+    async def adeduplicate(self, commit_hash: str) -> bool: ...
+    async def adeduplicate_many(self, commit_hashes: List[str]) -> set: ...
+    async def asearch_many(
+        self, queries: List[str], limit: int = 5, filter: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Memory]]: ...
+
+
+# Imported after Memory is defined: extractors import it back from this module.
+from .extractors import (  # noqa: E402
+    COMBINED_PROVIDERS,
+    BaseExtractor,
+    CombinedExtractor,
+    DecisionExtractor,
+    FactExtractor,
+    HedgedExtractor,
+    SkillExtractor,
+    TokenUsage,
+    collect_usage,
+    provider_of,
+)
+from .ratelimit import configure_rate_limit  # noqa: E402
+from .searchcache import SearchCache, bump_collection, collection_key  # noqa: E402
+
+if TYPE_CHECKING:
+    from .writebehind import WriteBehindQueue
+
+
+def _fingerprint(block: str) -> str:
+    """Content fingerprint of one message block, whitespace-insensitive."""
+    return hashlib.sha256(" ".join(block.split()).encode()).hexdigest()[:16]
+
+
+def split_context(context: str, chunk_chars: int, overlap_chars: int = 0) -> List[str]:
+    """
+    Split a long context into chunks of at most ``chunk_chars``, cutting on
+    message boundaries (blank line, else newline) where possible. Each chunk
+    after the first starts up to ``overlap_chars`` before the previous one
+    ended, so a fact straddling a cut is seen whole by at least one chunk.
+    """
+    if len(context) <= chunk_chars:
+        return [context]
+    overlap_chars = min(overlap_chars, chunk_chars // 4)
+
+    chunks: List[str] = []
+    start = 0
+    while start < len(context):
+        end = min(start + chunk_chars, len(context))
+        if end < len(context):
+            floor = start + chunk_chars // 2  # never cut a chunk below half size
+            cut = context.rfind("\n\n", floor, end)
+            if cut == -1:
+                cut = context.rfind("\n", floor, end)
+            if cut != -1:
+                end = cut + 1
+        chunks.append(context[start:end])
+        if end >= len(context):
+            break
+        # Back up by the overlap, then forward to the next line start
+        start = end - overlap_chars
+        boundary = context.find("\n", start, end)
+        if boundary != -1:
+            start = boundary + 1
+    return chunks
 
 
 class MemoryRescue:
@@ -61,6 +133,27 @@ class MemoryRescue:
             parallel_extractors=3,
         )
         memories = rescue.extract_and_commit(context_text)
+
+    Extractors share one pooled, keep-alive HTTP client owned by the rescue
+    engine, so repeated compactions skip DNS/TCP/TLS setup. Release it with
+    ``close()`` / ``aclose()`` or by using the engine as a context manager.
+
+    With ``search_cache``, repeated searches are served from a TTL/LRU
+    cache; any commit to the same collection invalidates it.
+
+    ``extraction_mode`` chooses between one request per perspective
+    ("fanout": parallel, but the context is sent once per perspective) and
+    one request returning every perspective ("combined": the context is
+    sent once). The default is "fanout"; "auto" picks combined for
+    providers known to handle it and a dict maps providers to modes.
+
+    With ``hedge_model``, an extraction request still outstanding after the
+    ``hedge_percentile`` of its recent latencies is also sent to that
+    model; the first answer is used and the other cancelled.
+
+    Extraction requests share a process-wide rate limiter per provider and
+    API key; ``requests_per_minute`` / ``tokens_per_minute`` set its limits
+    for ``fast_model``. 429s are retried after their ``Retry-After``.
     """
 
     def __init__(
@@ -74,6 +167,39 @@ class MemoryRescue:
         max_context_chars: int = 100_000,
         dedup: bool = True,
         session_id: str = "",
+        commit_concurrency: int = 8,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 60.0,
+        http2: bool = False,
+        request_timeout: float = 60.0,
+        stream: bool = False,
+        chunked: bool = False,
+        chunk_chars: Optional[int] = None,
+        chunk_overlap_chars: int = 2_000,
+        max_concurrent_requests: int = 16,
+        incremental: bool = False,
+        delta_overlap_chars: int = 2_000,
+        max_fingerprints_per_session: int = 100_000,
+        write_behind: bool = False,
+        write_queue_size: int = 10_000,
+        write_batch_size: int = 64,
+        write_queue_policy: str = "block",
+        search_cache: bool = False,
+        search_cache_size: int = 1024,
+        search_cache_ttl: float = 300.0,
+        semantic_dedup: bool = False,
+        semantic_dedup_threshold: float = 0.92,
+        semantic_dedup_neighbors: int = 3,
+        semantic_dedup_action: str = "drop",
+        extraction_mode: Union[str, Dict[str, str]] = "fanout",
+        hedge_model: Optional[str] = None,
+        hedge_api_base: Optional[str] = None,
+        hedge_api_key: Optional[str] = None,
+        hedge_percentile: float = 0.95,
+        hedge_initial_delay: float = 10.0,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
     ):
         self.backend = backend
         self.fast_model = fast_model
@@ -84,13 +210,124 @@ class MemoryRescue:
         self.max_context_chars = max_context_chars
         self.dedup = dedup
         self.session_id = session_id
+        self.commit_concurrency = commit_concurrency
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self.request_timeout = request_timeout
+        self.stream = stream
+        self.chunked = chunked
+        self.chunk_chars = chunk_chars or max_context_chars
+        self.chunk_overlap_chars = chunk_overlap_chars
+        self.max_concurrent_requests = max_concurrent_requests
+        self.incremental = incremental
+        self.delta_overlap_chars = delta_overlap_chars
+        self.max_fingerprints_per_session = max_fingerprints_per_session
+
+        # session_id -> fingerprints of message blocks already rescued
+        # (insertion-ordered dict used as a bounded set)
+        self._rescued: Dict[str, Dict[str, None]] = {}
+        self._delta_chars_in = 0
+        self._delta_chars_sent = 0
+
+        # Extraction token usage (prompt-cache hits) over all compactions
+        # and for the most recent one
+        self._usage = TokenUsage()
+        self.last_usage: Optional[TokenUsage] = None
+
+        # Write-behind: commits go to a background worker and
+        # extract_and_commit returns once extraction is done
+        self.writer: Optional["WriteBehindQueue"] = None
+        if write_behind:
+            from . import writebehind  # imports this module
+            self.writer = writebehind.WriteBehindQueue(
+                backend,
+                max_size=write_queue_size,
+                batch_size=write_batch_size,
+                policy=write_queue_policy,
+                dedup=dedup,
+                on_committed=lambda written: self._invalidate_searches(),
+            )
+
+        # Near-duplicate suppression: embeddings go through the backend's
+        # cache, so the commit that follows doesn't embed the text again
+        if semantic_dedup_action not in ("drop", "merge"):
+            raise ValueError(f"semantic_dedup_action must be 'drop' or 'merge', got {semantic_dedup_action!r}")
+        self.semantic_dedup = semantic_dedup
+        self.semantic_dedup_threshold = semantic_dedup_threshold
+        self.semantic_dedup_neighbors = semantic_dedup_neighbors
+        self.semantic_dedup_action = semantic_dedup_action
+        self._neardup = None
+        if semantic_dedup:
+            try:
+                from . import neardup
+            except ImportError:
+                raise ImportError("pip install numpy")
+            self._neardup = neardup
+        self._near_dups_batch = 0
+        self._near_dups_stored = 0
 
-        # Default extractors — one per perspective
-        self.extractors: List[BaseExtractor] = [
+        # Search results cached per collection version; commits bump it
+        self._collection = collection_key(backend)
+        self.search_cache: Optional[SearchCache] = (
+            SearchCache(max_entries=search_cache_size, ttl=search_cache_ttl)
+            if search_cache else None
+        )
+
+        # Shared extractor client, bound to the loop it was created on. The
+        # sync API drives a private long-lived loop so the pool survives
+        # between extract_and_commit() calls.
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Default extractors — one per perspective, or all of them in one
+        # combined request
+        perspectives: List[BaseExtractor] = [
             FactExtractor(model=fast_model, api_base=api_base, api_key=api_key),
             DecisionExtractor(model=fast_model, api_base=api_base, api_key=api_key),
             SkillExtractor(model=fast_model, api_base=api_base, api_key=api_key),
         ][:parallel_extractors]
+        self.extraction_mode = self._resolve_extraction_mode(extraction_mode, fast_model)
+        if len(perspectives) < 2:
+            # Nothing to combine
+            self.extraction_mode = "fanout"
+        self.extractors: List[BaseExtractor] = perspectives
+        if self.extraction_mode == "combined":
+            self.extractors = [CombinedExtractor(
+                model=fast_model, api_base=api_base, api_key=api_key,
+                perspectives=perspectives,
+            )]
+        if requests_per_minute or tokens_per_minute:
+            first = self.extractors[0]
+            configure_rate_limit(
+                first.provider, first.api_key,
+                requests_per_minute=requests_per_minute,
+                tokens_per_minute=tokens_per_minute,
+            )
+        if hedge_model:
+            # Same perspectives against a second provider, raced when slow
+            self.extractors = [
+                HedgedExtractor(
+                    ext,
+                    ext.with_model(hedge_model, api_base=hedge_api_base, api_key=hedge_api_key),
+                    percentile=hedge_percentile,
+                    initial_delay=hedge_initial_delay,
+                )
+                for ext in self.extractors
+            ]
+
+    @staticmethod
+    def _resolve_extraction_mode(mode: Union[str, Dict[str, str]], model: str) -> str:
+        provider = provider_of(model)
+        if isinstance(mode, dict):
+            mode = mode.get(provider, "fanout")
+        if mode == "auto":
+            mode = "combined" if provider in COMBINED_PROVIDERS else "fanout"
+        if mode not in ("fanout", "combined"):
+            raise ValueError(f"extraction_mode must be 'auto', 'fanout' or 'combined', got {mode!r}")
+        return mode
 
     def extract_and_commit(
         self,
@@ -105,9 +342,10 @@ class MemoryRescue:
             session_id: Optional session identifier for provenance
             
         Returns:
-            List of committed Memory objects
+            List of committed Memory objects (with write_behind, the
+            memories accepted onto the write queue)
         """
-        return asyncio.run(self.aextract_and_commit(context, session_id))
+        return self._run(self.aextract_and_commit(context, session_id))
 
     async def aextract_and_commit(
         self,
@@ -118,25 +356,76 @@ class MemoryRescue:
         Async entry point: extract memories in parallel and commit.
         """
         sid = session_id or self.session_id
-        
-        # Truncate context if needed
-        if len(context) > self.max_context_chars:
-            context = context[-self.max_context_chars:]
 
-        t0 = time.monotonic()
+        fingerprints: List[str] = []
+        if self.incremental:
+            # Only send what this session hasn't had rescued yet
+            context, fingerprints = self._delta(context, sid)
+            if not context:
+                return []
+
+        if self.chunked:
+            # Map over every chunk instead of dropping the head of the context
+            contexts = split_context(context, self.chunk_chars, self.chunk_overlap_chars)
+        elif len(context) > self.max_context_chars:
+            # Truncate context if needed
+            contexts = [context[-self.max_context_chars:]]
+        else:
+            contexts = [context]
+
+        # Per chunk: was it extracted and every memory from it stored (or
+        # accepted by write-behind)?
+        rescued = [False] * len(contexts)
+        with collect_usage() as usage:
+            if self.stream:
+                committed = await self._astream_and_commit(contexts, sid, rescued)
+            else:
+                committed = await self._abatch_and_commit(contexts, sid, rescued)
+
+        self.last_usage = usage
+        self._usage.merge(usage)
+
+        # A failed chunk must be re-sent next time, not remembered as rescued
+        if all(rescued):
+            self._mark_rescued(sid, fingerprints)
+        return committed
+
+    async def _abatch_and_commit(
+        self, contexts: List[str], sid: str, rescued: List[bool],
+    ) -> List[Memory]:
+        """
+        Batch pipeline: extract everything, then dedup and commit once.
+        Sets ``rescued[i]`` when some extractor answered for chunk ``i``
+        and none of its memories failed to commit.
+        """
+        # Fan-out: every extractor over every chunk, in parallel over the
+        # shared client, at most max_concurrent_requests in flight
+        client = self._get_client()
+        sem = asyncio.Semaphore(self.max_concurrent_requests)
+
+        async def run(ext: BaseExtractor, ctx: str) -> List[Memory]:
+            async with sem:
+                # _extract raises on failure, where extract() returns []
+                if hasattr(ext, "_extract"):
+                    return await ext._extract(ctx, client)
+                return await ext.extract(ctx, client=client)
 
-        # Fan-out: run all extractors in parallel
-        tasks = [ext.extract(context) for ext in self.extractors]
+        tasks = [run(ext, ctx) for ctx in contexts for ext in self.extractors]
         results = await asyncio.gather(*tasks, return_exceptions=True)
 
         # Flatten and filter
+        extracted = [False] * len(contexts)
+        chunk_hashes: List[set] = [set() for _ in contexts]
         all_memories: List[Memory] = []
         for i, result in enumerate(results):
             if isinstance(result, Exception):
                 continue
+            index = i // len(self.extractors)
+            extracted[index] = True
             for mem in result:
+                chunk_hashes[index].add(mem.commit_hash)
                 mem.source_session = sid
-                mem.extraction_model = self.fast_model
+                mem.extraction_model = mem.extraction_model or self.fast_model
                 all_memories.append(mem)
 
         # Score importance (already done by extractors, but filter here)
@@ -145,27 +434,493 @@ class MemoryRescue:
             if m.importance >= self.importance_threshold
         ]
 
-        # Deduplicate against existing memories
-        committed: List[Memory] = []
+        # Reduce: deduplicate within this batch (two perspectives or two
+        # overlapping chunks can extract the identical statement), then
+        # against existing memories, and commit
+        unique: Dict[str, Memory] = {}
         for mem in qualified:
-            if self.dedup and self.backend.deduplicate(mem.commit_hash):
-                continue  # Already exists
-            if self.backend.commit(mem):
-                committed.append(mem)
+            unique.setdefault(mem.commit_hash, mem)
+        failed: set = set()
+        committed = await self._adedup_and_commit(list(unique.values()), failed)
+        for index in range(len(contexts)):
+            rescued[index] = extracted[index] and not (chunk_hashes[index] & failed)
+        return committed
+
+    def _delta(self, context: str, sid: str) -> Tuple[str, List[str]]:
+        """
+        Reduce ``context`` to the message blocks not yet rescued for ``sid``.
+
+        Blocks are fingerprinted by content, so text retained verbatim across
+        compactions is recognised wherever it ends up. Each run of new blocks
+        is preceded by up to ``delta_overlap_chars`` of already-rescued text
+        for continuity. Returns the delta and the fingerprints to record
+        once it has been rescued.
+        """
+        seen = self._rescued.get(sid, {})
+        blocks = [b for b in context.split("\n\n") if b.strip()]
+        prints = [_fingerprint(b) for b in blocks]
+
+        parts: List[str] = []
+        fresh: List[str] = []
+        for i, (block, fp) in enumerate(zip(blocks, prints)):
+            if fp not in seen:
+                if i > 0 and prints[i - 1] in seen:
+                    # Start of a new run — lead in with rescued context
+                    lead: List[str] = []
+                    budget = self.delta_overlap_chars
+                    j = i - 1
+                    while j >= 0 and prints[j] in seen and budget > 0:
+                        lead.insert(0, blocks[j][-budget:])
+                        budget -= len(blocks[j]) + 2
+                        j -= 1
+                    parts.extend(lead)
+                parts.append(block)
+                fresh.append(fp)
+
+        self._delta_chars_in += len(context)
+        self._delta_chars_sent += sum(len(p) + 2 for p in parts)
+        return "\n\n".join(parts), fresh
+
+    def _mark_rescued(self, sid: str, fingerprints: List[str]) -> None:
+        """Record rescued blocks for ``sid``, oldest forgotten past the cap."""
+        if not fingerprints:
+            return
+        seen = self._rescued.setdefault(sid, {})
+        for fp in fingerprints:
+            seen[fp] = None
+        while len(seen) > self.max_fingerprints_per_session:
+            del seen[next(iter(seen))]
+
+    async def _astream_and_commit(
+        self, contexts: List[str], sid: str, rescued: List[bool],
+    ) -> List[Memory]:
+        """
+        Streaming pipeline: memories are deduplicated and committed in small
+        batches while the extractors are still generating, so total latency
+        approaches the slowest generation rather than generation + commit.
+        Sets ``rescued[i]`` when some extractor finished chunk ``i`` and none
+        of its memories failed to commit.
+        """
+        client = self._get_client()
+        sem = asyncio.Semaphore(self.max_concurrent_requests)
+        queue: asyncio.Queue = asyncio.Queue()
+        finished = object()  # per-producer end marker
+
+        async def produce(ext: BaseExtractor, index: int) -> None:
+            # _stream raises on failure, where stream() just ends
+            stream = ext._stream if hasattr(ext, "_stream") else ext.stream
+            try:
+                async with sem:
+                    async for mem in stream(contexts[index], client):
+                        await queue.put((index, mem))
+                extracted[index] = True
+            except Exception:
+                pass  # memories already yielded stand
+            finally:
+                await queue.put(finished)
+
+        producers = [
+            asyncio.create_task(produce(ext, index))
+            for index in range(len(contexts)) for ext in self.extractors
+        ]
+        extracted = [False] * len(contexts)
+        chunk_hashes: List[set] = [set() for _ in contexts]
+        failed: set = set()
+        commits: List[asyncio.Task] = []
+        seen: set = set()
+        running = len(producers)
 
-        elapsed = time.monotonic() - t0
+        while running:
+            # Take whatever has arrived since the last batch went out
+            batch: List[Memory] = []
+            item = await queue.get()
+            while True:
+                if item is finished:
+                    running -= 1
+                else:
+                    index, mem = item
+                    chunk_hashes[index].add(mem.commit_hash)
+                    if mem.importance >= self.importance_threshold and mem.commit_hash not in seen:
+                        seen.add(mem.commit_hash)
+                        mem.source_session = sid
+                        mem.extraction_model = mem.extraction_model or self.fast_model
+                        batch.append(mem)
+                if queue.empty():
+                    break
+                item = queue.get_nowait()
+            if batch:
+                commits.append(asyncio.create_task(self._adedup_and_commit(batch, failed)))
 
+        await asyncio.gather(*producers, return_exceptions=True)
+        results = await asyncio.gather(*commits)
+        for index in range(len(contexts)):
+            rescued[index] = extracted[index] and not (chunk_hashes[index] & failed)
+        return [mem for committed in results for mem in committed]
+
+    async def _adedup_and_commit(
+        self, batch: List[Memory], failed: Optional[set] = None,
+    ) -> List[Memory]:
+        """
+        Drop memories the backend already has, commit the rest in one batch.
+        Adds the hash of every memory that was neither stored nor accepted
+        by write-behind to ``failed``.
+        """
+        if self._neardup is not None and batch:
+            batch = await self._asuppress_near_duplicates(batch)
+
+        if self.writer is not None:
+            # The worker dedups and commits; put_many may block on a full queue
+            accepted = await asyncio.to_thread(self.writer.put_many, batch) if batch else []
+            if failed is not None and len(accepted) < len(batch):
+                taken = {m.commit_hash for m in accepted}
+                failed.update(m.commit_hash for m in batch if m.commit_hash not in taken)
+            return accepted
+
+        if self.dedup and batch:
+            exists = await self._adeduplicate_many([m.commit_hash for m in batch])
+            batch = [m for m in batch if m.commit_hash not in exists]
+
+        # Commit in one batched embed + upsert instead of a round trip per memory
+        results = await self._acommit_many(batch) if batch else []
+        committed = [mem for mem, ok in zip(batch, results) if ok]
+        if failed is not None and len(committed) < len(batch):
+            failed.update(mem.commit_hash for mem, ok in zip(batch, results) if not ok)
+        if committed:
+            self._invalidate_searches()
         return committed
 
-    def search(self, query: str, limit: int = 5) -> List[Memory]:
-        """Search previously rescued memories."""
-        return self.backend.search(query, limit=limit)
+    async def _asuppress_near_duplicates(self, batch: List[Memory]) -> List[Memory]:
+        """
+        Collapse near-duplicates within the batch (one pairwise cosine
+        matrix product), then drop any survivor whose nearest stored
+        neighbours are above the threshold. Within the batch, duplicates
+        are dropped or merged into the highest-importance representative.
+        Best effort: a backend that can't embed or look up neighbours
+        leaves the batch as it was.
+        """
+        backend = self.backend
+        texts = [m.text for m in batch]
+        try:
+            if hasattr(backend, "aembed_many"):
+                vectors = await backend.aembed_many(texts)
+            elif hasattr(backend, "embed_many"):
+                vectors = await asyncio.to_thread(backend.embed_many, texts)
+            else:
+                return batch
+        except Exception:
+            return batch
+
+        kept: List[Memory] = []
+        kept_vectors: List[List[float]] = []
+        for cluster in self._neardup.cluster_batch(batch, vectors, self.semantic_dedup_threshold):
+            representative = batch[cluster[0]]
+            duplicates = [batch[j] for j in cluster[1:]]
+            if self.semantic_dedup_action == "merge":
+                self._neardup.merge(representative, duplicates)
+            self._near_dups_batch += len(duplicates)
+            kept.append(representative)
+            kept_vectors.append(vectors[cluster[0]])
+
+        args = (kept_vectors, self.semantic_dedup_neighbors, self.semantic_dedup_threshold)
+        try:
+            if hasattr(backend, "anearest_many"):
+                neighbours = await backend.anearest_many(*args)
+            elif hasattr(backend, "nearest_many"):
+                neighbours = await asyncio.to_thread(backend.nearest_many, *args)
+            else:
+                return kept
+        except Exception:
+            return kept
+
+        fresh: List[Memory] = []
+        for mem, near in zip(kept, neighbours):
+            if any(existing.commit_hash != mem.commit_hash for _, existing in near):
+                self._near_dups_stored += 1
+            else:
+                fresh.append(mem)  # exact copies are left to hash dedup
+        return fresh
+
+    def _invalidate_searches(self) -> None:
+        bump_collection(self._collection)
+
+    def search(
+        self,
+        query: str,
+        limit: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Memory]:
+        """
+        Search previously rescued memories. ``filter`` restricts results by
+        payload field (see ``cartu_method.filters``) and is pushed down to
+        the backend, e.g. ``{"category": "decision", "importance": {"gte": 8}}``.
+        """
+        return self.search_many([query], limit, filter)[0]
+
+    async def asearch(
+        self,
+        query: str,
+        limit: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Memory]:
+        """Async search; never blocks the event loop on backend I/O."""
+        return (await self.asearch_many([query], limit, filter))[0]
+
+    def search_many(
+        self,
+        queries: List[str],
+        limit: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Memory]]:
+        """
+        Search several queries at once — one batched embedding call and one
+        backend round trip where the backend supports it. Results per query.
+        """
+        out, keys, misses = self._cached_searches(queries, limit, filter)
+        if misses:
+            # Only pass filter when set, so filterless custom backends still work
+            kwargs: Dict[str, Any] = {"filter": filter} if filter else {}
+            start = time.perf_counter()
+            pending = [queries[i] for i in misses]
+            if len(pending) > 1 and hasattr(self.backend, "search_many"):
+                fresh = self.backend.search_many(pending, limit=limit, **kwargs)
+            else:
+                fresh = [self.backend.search(q, limit=limit, **kwargs) for q in pending]
+            self._store_searches(out, keys, misses, fresh, time.perf_counter() - start)
+        return out
+
+    async def asearch_many(
+        self,
+        queries: List[str],
+        limit: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Memory]]:
+        """Async search_many."""
+        out, keys, misses = self._cached_searches(queries, limit, filter)
+        if misses:
+            kwargs: Dict[str, Any] = {"filter": filter} if filter else {}
+            start = time.perf_counter()
+            pending = [queries[i] for i in misses]
+            fresh = await self._asearch_backend(pending, limit, kwargs)
+            self._store_searches(out, keys, misses, fresh, time.perf_counter() - start)
+        return out
+
+    async def _asearch_backend(
+        self,
+        queries: List[str],
+        limit: int,
+        kwargs: Dict[str, Any],
+    ) -> List[List[Memory]]:
+        if len(queries) > 1:
+            if hasattr(self.backend, "asearch_many"):
+                return await self.backend.asearch_many(queries, limit=limit, **kwargs)
+            if hasattr(self.backend, "search_many"):
+                return await asyncio.to_thread(
+                    functools.partial(self.backend.search_many, queries, limit=limit, **kwargs)
+                )
+
+        async def one(query: str) -> List[Memory]:
+            if hasattr(self.backend, "asearch"):
+                return await self.backend.asearch(query, limit=limit, **kwargs)
+            return await asyncio.to_thread(
+                functools.partial(self.backend.search, query, limit=limit, **kwargs)
+            )
+
+        return await self._bounded_gather([one(q) for q in queries])
+
+    def _cached_searches(
+        self,
+        queries: List[str],
+        limit: int,
+        filter: Optional[Dict[str, Any]] = None,
+    ):
+        """Split queries into cached results and the indexes still to search."""
+        out: List[List[Memory]] = [[] for _ in queries]
+        if self.search_cache is None:
+            return out, [], list(range(len(queries)))
+        keys = [self.search_cache.key(self._collection, q, limit, filter) for q in queries]
+        misses = []
+        for i, key in enumerate(keys):
+            cached = self.search_cache.get(key)
+            if cached is None:
+                misses.append(i)
+            else:
+                out[i] = cached
+        return out, keys, misses
+
+    def _store_searches(
+        self,
+        out: List[List[Memory]],
+        keys: List[Any],
+        misses: List[int],
+        fresh: List[List[Memory]],
+        elapsed: float,
+    ) -> None:
+        for i, results in zip(misses, fresh):
+            out[i] = results
+            # Backends report errors as [] too: never pin an empty answer
+            # for the TTL, or an outage outlives its recovery
+            if self.search_cache is not None and results:
+                self.search_cache.put(keys[i], results, elapsed / len(misses))
+
+    # Backends that implement AsyncVectorBackend are awaited directly; plain
+    # VectorBackends are offloaded to a thread so the loop keeps running.
+
+    async def _adeduplicate(self, commit_hash: str) -> bool:
+        if hasattr(self.backend, "adeduplicate"):
+            return await self.backend.adeduplicate(commit_hash)
+        return await asyncio.to_thread(self.backend.deduplicate, commit_hash)
+
+    async def _adeduplicate_many(self, commit_hashes: List[str]) -> set:
+        """One round trip for the whole batch; per-hash checks as a fallback."""
+        if hasattr(self.backend, "adeduplicate_many"):
+            return await self.backend.adeduplicate_many(commit_hashes)
+        if hasattr(self.backend, "deduplicate_many"):
+            return await asyncio.to_thread(self.backend.deduplicate_many, commit_hashes)
+        exists = await self._bounded_gather(
+            [self._adeduplicate(h) for h in commit_hashes]
+        )
+        return {h for h, found in zip(commit_hashes, exists) if found}
+
+    async def _acommit(self, memory: Memory) -> bool:
+        if hasattr(self.backend, "acommit"):
+            return await self.backend.acommit(memory)
+        return await asyncio.to_thread(self.backend.commit, memory)
+
+    async def _acommit_many(self, memories: List[Memory]) -> List[bool]:
+        """One batched upsert; per-memory commits as a fallback."""
+        if hasattr(self.backend, "acommit_many"):
+            return await self.backend.acommit_many(memories)
+        if hasattr(self.backend, "commit_many"):
+            return await asyncio.to_thread(self.backend.commit_many, memories)
+        return await self._bounded_gather([self._acommit(m) for m in memories])
+
+    async def _bounded_gather(self, coros: List[Any]) -> List[Any]:
+        """Run coroutines concurrently, at most ``commit_concurrency`` at once."""
+        sem = asyncio.Semaphore(self.commit_concurrency)
+
+        async def run(coro):
+            async with sem:
+                return await coro
+
+        return await asyncio.gather(*[run(c) for c in coros])
+
+    # -- Write-behind durability points -----------------------------------
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until queued memories are written. No-op without write_behind."""
+        return self.writer.flush(timeout) if self.writer is not None else True
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Flush and stop the write-behind worker."""
+        return self.writer.drain(timeout) if self.writer is not None else True
+
+    # -- HTTP client lifecycle --------------------------------------------
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the pooled client for the running loop, creating it lazily."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            # A client is tied to the loop its connections were opened on;
+            # one left behind on another loop is simply dropped.
+            self._client = httpx.AsyncClient(
+                timeout=self.request_timeout,
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+            )
+            self._client_loop = loop
+        return self._client
+
+    def _run(self, coro):
+        """Run a coroutine on the engine's private loop (sync API)."""
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coro)
+
+    async def aclose(self) -> None:
+        """Drain pending writes and close the shared HTTP clients."""
+        await asyncio.to_thread(self.drain)
+        if hasattr(self.backend, "aclose"):
+            await self.backend.aclose()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._client_loop = None
+
+    def close(self) -> None:
+        """Drain pending writes, close the shared HTTP client and private loop."""
+        self.drain()
+        if self._loop is not None and not self._loop.is_closed():
+            if self._client is not None and self._client_loop is self._loop:
+                self._loop.run_until_complete(self.aclose())
+            self._loop.close()
+        self._loop = None
+
+    async def __aenter__(self) -> "MemoryRescue":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    def __enter__(self) -> "MemoryRescue":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _rate_limit_stats(self) -> Dict[str, Any]:
+        """Queueing and 429 stats of the limiters this engine's requests go through."""
+        out: Dict[str, Any] = {}
+        for ext in self.extractors:
+            sources = (ext.primary, ext.secondary) if isinstance(ext, HedgedExtractor) else (ext,)
+            for source in sources:
+                limiter = getattr(source, "limiter", None)
+                if limiter is not None:
+                    out[limiter.name] = limiter.stats()
+        return out
+
+    def _hedge_stats(self) -> Optional[Dict[str, Any]]:
+        hedged = [e for e in self.extractors if isinstance(e, HedgedExtractor)]
+        if not hedged:
+            return None
+        requests = sum(e.requests for e in hedged)
+        hedges = sum(e.hedged for e in hedged)
+        wins = sum(e.hedge_wins for e in hedged)
+        return {
+            "requests": requests,
+            "hedged": hedges,
+            "hedge_rate": hedges / requests if requests else 0.0,
+            "hedge_wins": wins,
+            "win_rate": wins / hedges if hedges else 0.0,
+        }
 
     def stats(self) -> Dict[str, Any]:
         """Return rescue statistics."""
         return {
             "model": self.fast_model,
             "extractors": len(self.extractors),
+            "extraction_mode": self.extraction_mode,
+            "hedging": self._hedge_stats(),
+            "rate_limit": self._rate_limit_stats(),
+            "token_usage": self._usage.as_dict(),
+            "last_compaction_usage": self.last_usage.as_dict() if self.last_usage else None,
             "threshold": self.importance_threshold,
             "dedup": self.dedup,
+            "stream": self.stream,
+            "chunked": self.chunked,
+            "incremental": self.incremental,
+            "delta_chars_in": self._delta_chars_in,
+            "delta_chars_sent": self._delta_chars_sent,
+            "write_queue": self.writer.stats() if self.writer is not None else None,
+            "semantic_dedup": self.semantic_dedup,
+            "near_duplicates_in_batch": self._near_dups_batch,
+            "near_duplicates_of_stored": self._near_dups_stored,
+            "search_cache": self.search_cache.stats() if self.search_cache is not None else None,
+            "embedding_cache": (
+                self.backend.embedding_cache.stats()
+                if hasattr(self.backend, "embedding_cache") else None
+            ),
         }
@@ -0,0 +1,120 @@
+"""
+Query-result cache in front of ``MemoryRescue.search``.
+
+Entries are keyed by collection, collection version, normalised query,
+limit and filters. Committing to a collection bumps its version, which
+retires every cached result for it at once; stale entries simply stop
+matching and age out of the LRU.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+# Versions are process-wide so every engine writing to a collection
+# invalidates every engine's cached searches on it.
+_versions: Dict[Hashable, int] = {}
+_versions_lock = threading.Lock()
+
+
+def collection_key(backend: Any) -> Hashable:
+    """Identify the collection a backend writes to."""
+    collection = getattr(backend, "collection", None)
+    if collection is not None and not isinstance(collection, str):
+        collection = getattr(collection, "name", id(collection))  # Chroma collection object
+    return (
+        type(backend).__name__,
+        getattr(backend, "url", None),
+        getattr(backend, "index_name", None),
+        collection,
+        getattr(getattr(backend, "store", None), "path", None),
+    )
+
+
+def collection_version(key: Hashable) -> int:
+    return _versions.get(key, 0)
+
+
+def bump_collection(key: Hashable) -> None:
+    """Invalidate cached searches on a collection."""
+    with _versions_lock:
+        _versions[key] = _versions.get(key, 0) + 1
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class SearchCache:
+    """
+    TTL + LRU cache of search results.
+
+    Each entry remembers how long the backend search that produced it
+    took, so ``stats()`` can report the latency hits saved.
+
+    Only non-empty results are cached: backends return ``[]`` for errors
+    as well as for no hits, and the two can't be told apart.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # key -> (stored_at, latency_s, results)
+        self._entries: "OrderedDict[Tuple, Tuple[float, float, List[Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.saved_s = 0.0
+
+    @staticmethod
+    def key(
+        collection: Hashable,
+        query: str,
+        limit: int,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Tuple:
+        filter_key = json.dumps(filters, sort_keys=True, default=str) if filters else None
+        return (
+            collection, collection_version(collection),
+            normalize_query(query), limit, filter_key,
+        )
+
+    def get(self, key: Tuple) -> Optional[List[Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_s += entry[1]
+            return list(entry[2])
+
+    def put(self, key: Tuple, results: List[Any], latency: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), latency, list(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_latency_s": self.saved_s,
+        }
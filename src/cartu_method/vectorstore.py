@@ -0,0 +1,663 @@
+"""
+On-disk vector store for single-node deployments — the storage engine
+behind ``LocalBackend``.
+
+Layout of a store directory:
+    vectors.npy     float32 (rows, dim), L2-normalised, append-only
+    hashes.npy      uint64 (rows,), commit hash of each row
+    offsets.npy     int64 (rows,), byte offset of each row's payload
+    payloads.jsonl  one JSON payload per row
+
+plus, with quantization enabled:
+    codes_int8.npy  int8 (rows, dim) and scales.npy float32 (rows,)
+    codes_binary.npy  uint8 (rows, dim / 8), sign bits
+
+and, with the IVF index enabled:
+    ivf_centroids.npy  float32 (nlist, dim)
+    ivf_assign.npy     int32 (rows,), list of each row, append-only
+    ivf_order.npy      int64, indexed rows sorted by list
+    ivf_bounds.npy     int64 (nlist + 1,), list boundaries in ivf_order
+
+The ``.npy`` files are ordinary NumPy arrays (``np.load(..., mmap_mode="r")``
+works) whose header is padded to a fixed size so it can be rewritten in
+place as rows are appended. Everything is memory-mapped, so opening a
+store costs the same at 10 rows as at 10 million.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+QUANTIZATIONS = ("int8", "binary")
+
+if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+    _popcount = np.bitwise_count
+else:
+    _POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(x: np.ndarray) -> np.ndarray:
+        return _POPCOUNT[x]
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-vector int8 codes: v ~= codes * scale."""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales = np.clip(scales, 1e-12, None).astype(np.float32)
+    codes = np.round(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """One sign bit per dimension, packed 8 to a byte."""
+    return np.packbits(vectors > 0, axis=1)
+
+
+def hash_key(commit_hash: str) -> int:
+    """Map a commit hash to the uint64 stored in ``hashes.npy``."""
+    try:
+        return int(commit_hash[:16], 16)
+    except ValueError:
+        return int.from_bytes(hashlib.blake2b(commit_hash.encode(), digest_size=8).digest(), "little")
+
+
+class NpyAppender:
+    """Append-only ``.npy`` file, memory-mapped for reads."""
+
+    HEADER_LEN = 128  # fixed, so the shape can grow without moving data
+
+    def __init__(self, path: str, dtype: Any, width: Optional[int] = None):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.width = width
+        self._row_bytes = self.dtype.itemsize * (width or 1)
+        self._view: Optional[np.ndarray] = None
+
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                np.lib.format.read_magic(f)
+                shape, _, _ = np.lib.format.read_array_header_1_0(f)
+            self.rows = shape[0]
+            # Drop a partially written row left by a crash mid-append
+            size = self.HEADER_LEN + self.rows * self._row_bytes
+            if os.path.getsize(path) != size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+        else:
+            self.rows = 0
+            with open(path, "wb") as f:
+                f.write(self._header(0))
+
+    def _header(self, rows: int) -> bytes:
+        shape = (rows, self.width) if self.width else (rows,)
+        text = repr({"descr": self.dtype.str, "fortran_order": False, "shape": shape})
+        body = text.encode("latin1").ljust(self.HEADER_LEN - 10 - 1) + b"\n"
+        return b"\x93NUMPY\x01\x00" + len(body).to_bytes(2, "little") + body
+
+    def append(self, values: np.ndarray) -> None:
+        values = np.ascontiguousarray(values, dtype=self.dtype)
+        with open(self.path, "r+b") as f:
+            f.seek(0, os.SEEK_END)
+            f.write(values.tobytes())
+            f.flush()
+            self.rows += len(values)
+            f.seek(0)
+            f.write(self._header(self.rows))
+        self._view = None
+
+    def truncate(self, rows: int) -> None:
+        with open(self.path, "r+b") as f:
+            f.truncate(self.HEADER_LEN + rows * self._row_bytes)
+            f.seek(0)
+            f.write(self._header(rows))
+        self.rows = rows
+        self._view = None
+
+    def view(self) -> np.ndarray:
+        """Read-only memory map of the current rows."""
+        if self._view is None or len(self._view) != self.rows:
+            shape = (self.rows, self.width) if self.width else (self.rows,)
+            if self.rows == 0:
+                self._view = np.empty(shape, dtype=self.dtype)
+            else:
+                self._view = np.memmap(
+                    self.path, dtype=self.dtype, mode="r",
+                    offset=self.HEADER_LEN, shape=shape,
+                )
+        return self._view
+
+
+class IVFIndex:
+    """
+    Inverted-file ANN index over a VectorStore's normalised vectors.
+
+    Spherical k-means splits the vectors into ``nlist`` lists; a query only
+    scores the rows in its ``nprobe`` nearest lists. New rows are assigned
+    to their nearest centroid as they are appended (``add``) and sit in an
+    unsorted tail until ``compact`` folds them into the sorted lists.
+    ``fit`` and the list sort run without touching the live index and the
+    results are swapped in at the end, so maintenance can happen in a
+    background thread while searches continue.
+    """
+
+    def __init__(self, path: str, dimension: int):
+        self.path = path
+        self.dimension = dimension
+        self.assign = NpyAppender(os.path.join(path, "ivf_assign.npy"), np.int32)
+        # (centroids, order, bounds), swapped in one assignment so readers
+        # never see centroids paired with another training's lists
+        self._index: Tuple[Optional[np.ndarray], np.ndarray, np.ndarray] = (
+            None, np.empty(0, dtype=np.int64), np.zeros(1, dtype=np.int64),
+        )
+        centroids_path = os.path.join(path, "ivf_centroids.npy")
+        if os.path.exists(centroids_path):
+            self._index = (
+                np.load(centroids_path),
+                np.load(os.path.join(path, "ivf_order.npy"), mmap_mode="r"),
+                np.load(os.path.join(path, "ivf_bounds.npy")),
+            )
+
+    @property
+    def centroids(self) -> Optional[np.ndarray]:
+        return self._index[0]
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def nlist(self) -> int:
+        return 0 if self.centroids is None else len(self.centroids)
+
+    @property
+    def indexed_rows(self) -> int:
+        return len(self._index[1])
+
+    @property
+    def tail_rows(self) -> int:
+        """Rows assigned since the last compaction."""
+        return self.assign.rows - self.indexed_rows
+
+    @staticmethod
+    def nearest(centroids: np.ndarray, vectors: np.ndarray, block: int = 65_536) -> np.ndarray:
+        out = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), block):
+            chunk = np.asarray(vectors[start:start + block], dtype=np.float32)
+            out[start:start + block] = np.argmax(chunk @ centroids.T, axis=1)
+        return out
+
+    def add(self, vectors: np.ndarray) -> None:
+        if self.trained:
+            self.assign.append(self.nearest(self.centroids, vectors))
+
+    def sync(self, matrix: np.ndarray) -> None:
+        """Reconcile assignments with the store's row count (crash or index newly enabled)."""
+        if not self.trained:
+            return
+        if self.assign.rows > len(matrix):
+            self.assign.truncate(len(matrix))
+            self._index = (self.centroids, *self._sorted_lists(np.asarray(self.assign.view())))
+        if self.assign.rows < len(matrix):
+            self.add(matrix[self.assign.rows:])
+
+    def fit(
+        self,
+        matrix: np.ndarray,
+        nlist: Optional[int] = None,
+        iterations: int = 10,
+        sample_size: int = 262_144,
+        seed: int = 0,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Learn centroids from a sample of ``matrix``; returns (centroids, assignments)."""
+        n = len(matrix)
+        nlist = min(n, nlist or max(1, min(65_536, int(4 * np.sqrt(n)))))
+        rng = np.random.default_rng(seed)
+        sample_idx = np.sort(rng.choice(n, size=min(n, max(sample_size, nlist)), replace=False))
+        sample = np.asarray(matrix[sample_idx], dtype=np.float32)
+
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = self.nearest(centroids, sample)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            # Re-seed empty lists from random sample points
+            empty = np.bincount(labels, minlength=nlist) == 0
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+            centroids = sums / np.clip(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12, None)
+        return centroids, self.nearest(centroids, matrix)
+
+    def install(self, centroids: np.ndarray, assign: np.ndarray) -> None:
+        """Replace centroids and every assignment. Caller serialises with appends."""
+        lists = self._sorted_lists(assign, len(centroids))
+        np.save(os.path.join(self.path, "ivf_centroids.npy"), centroids)
+        tmp = os.path.join(self.path, "ivf_assign.npy.tmp")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        NpyAppender(tmp, np.int32).append(assign)
+        os.replace(tmp, self.assign.path)
+        self._save_lists(lists)
+        self.assign = NpyAppender(self.assign.path, np.int32)
+        self._index = (centroids, *lists)
+
+    def compact(self) -> None:
+        """Fold the tail into the sorted inverted lists."""
+        if self.trained and self.tail_rows:
+            lists = self._sorted_lists(np.asarray(self.assign.view()))
+            self._save_lists(lists)
+            self._index = (self.centroids, *lists)
+
+    def _sorted_lists(
+        self,
+        assign: np.ndarray,
+        nlist: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        order = np.argsort(assign, kind="stable").astype(np.int64)
+        bounds = np.searchsorted(assign[order], np.arange((nlist or self.nlist) + 1))
+        return order, bounds.astype(np.int64)
+
+    def _save_lists(self, lists: Tuple[np.ndarray, np.ndarray]) -> None:
+        for name, arr in zip(("ivf_order.npy", "ivf_bounds.npy"), lists):
+            tmp = os.path.join(self.path, f"{name}.tmp.npy")
+            np.save(tmp, arr)
+            os.replace(tmp, os.path.join(self.path, name))
+
+    def probe(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """Sorted candidate rows for one normalised query: its nprobe nearest lists."""
+        centroids, order, bounds = self._index
+        nprobe = min(nprobe, len(centroids))
+        lists = np.argpartition(-(centroids @ query), nprobe - 1)[:nprobe]
+        parts = [np.asarray(order[bounds[l]:bounds[l + 1]]) for l in lists]
+        indexed = len(order)
+        assign = self.assign
+        if assign.rows > indexed:
+            tail = np.asarray(assign.view()[indexed:])
+            parts.append(np.nonzero(np.isin(tail, lists))[0] + indexed)
+        return np.sort(np.concatenate(parts))
+
+
+class VectorStore:
+    """
+    Append-only, memory-mapped vector matrix with a sidecar payload store.
+
+    Exact search is a vectorised cosine (dot product of normalised vectors)
+    over the matrix in blocks of ``block_rows``, with ``argpartition``
+    top-k per block.
+
+    With ``quantization`` set, compact codes are kept alongside the
+    full-precision matrix and scanned instead of it: ``"int8"`` (4x
+    smaller, dot product against int8 codes) or ``"binary"`` (32x smaller,
+    Hamming distance on sign bits). The best ``k * rescore_factor``
+    candidates are then rescored exactly from the float32 rows, which stay
+    on disk and are only paged in for those candidates.
+
+    Neither mode is exact. int8 with the default ``rescore_factor`` (4)
+    usually matches exact search. Binary codes lose much more, most of all
+    on low-dimensional vectors: on 60K random 64-d vectors recall@10 is
+    about 0.5 even at the default ``rescore_factor`` of 40. Raising it
+    buys recall back at the cost of paging in more rows. Measure on your
+    own vectors with ``evaluate_recall`` before choosing binary.
+
+    With ``index="ivf"``, searches go through an ``IVFIndex`` instead of a
+    full scan once the store holds ``min_train_rows`` vectors: only the
+    ``nprobe`` nearest of ``nlist`` lists are scored (quantized first,
+    when configured). Raising ``nprobe`` trades latency for recall; the
+    default of 16 can miss a large share of the true top-k (recall@10 of
+    0.3-0.4 on random data), so check ``evaluate_recall`` at the intended
+    ``nprobe`` too. The
+    index is trained in the background when the threshold is first
+    crossed, new rows are assigned on append, and the unsorted tail is
+    compacted in the background once it exceeds ``compact_ratio`` of the
+    indexed rows; ``rebuild_index`` retrains from scratch.
+
+    Writes are serialised with a lock; one process should own a store
+    directory for writing.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        dimension: int,
+        block_rows: int = 262_144,
+        quantization: Optional[str] = None,
+        rescore_factor: Optional[int] = None,
+        index: Optional[str] = None,
+        nlist: Optional[int] = None,
+        nprobe: int = 16,
+        min_train_rows: int = 50_000,
+        compact_ratio: float = 0.1,
+    ):
+        if index not in (None, "ivf"):
+            raise ValueError(f"index must be None or 'ivf', got {index!r}")
+        if quantization is not None and quantization not in QUANTIZATIONS:
+            raise ValueError(f"quantization must be one of {QUANTIZATIONS}, got {quantization!r}")
+        self.path = os.path.expanduser(path)
+        os.makedirs(self.path, exist_ok=True)
+        self.dimension = dimension
+        self.block_rows = block_rows
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor or (4 if quantization == "int8" else 40)
+        self._lock = threading.Lock()
+
+        self.vectors = NpyAppender(os.path.join(self.path, "vectors.npy"), np.float32, dimension)
+        self.hashes = NpyAppender(os.path.join(self.path, "hashes.npy"), np.uint64)
+        self.offsets = NpyAppender(os.path.join(self.path, "offsets.npy"), np.int64)
+        self._payload_path = os.path.join(self.path, "payloads.jsonl")
+        if not os.path.exists(self._payload_path):
+            open(self._payload_path, "wb").close()
+        self._recover()
+
+        self.codes: Optional[NpyAppender] = None
+        self.scales: Optional[NpyAppender] = None
+        if quantization == "int8":
+            self.codes = NpyAppender(os.path.join(self.path, "codes_int8.npy"), np.int8, dimension)
+            self.scales = NpyAppender(os.path.join(self.path, "scales.npy"), np.float32)
+        elif quantization == "binary":
+            self.codes = NpyAppender(
+                os.path.join(self.path, "codes_binary.npy"), np.uint8, (dimension + 7) // 8,
+            )
+        self._sync_codes()
+
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_rows = min_train_rows
+        self.compact_ratio = compact_ratio
+        self.ivf: Optional[IVFIndex] = None
+        self._maintenance: Optional[threading.Thread] = None
+        if index == "ivf":
+            self.ivf = IVFIndex(self.path, dimension)
+            self.ivf.sync(self.vectors.view())
+
+        self._hash_set: Optional[Set[int]] = None  # built on first dedup check
+
+    def _recover(self) -> None:
+        """Trim every file to the rows all of them have (crash mid-append)."""
+        rows = min(self.vectors.rows, self.hashes.rows, self.offsets.rows)
+        for arr in (self.vectors, self.hashes, self.offsets):
+            if arr.rows != rows:
+                arr.truncate(rows)
+        end = int(self.offsets.view()[-1]) if rows else 0
+        if rows:
+            with open(self._payload_path, "rb") as f:
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+        if os.path.getsize(self._payload_path) != end:
+            with open(self._payload_path, "r+b") as f:
+                f.truncate(end)
+
+    def _sync_codes(self) -> None:
+        """Bring the quantized codes in line with the vectors (new or stale)."""
+        if self.codes is None:
+            return
+        rows = len(self)
+        for arr in (self.codes, self.scales):
+            if arr is not None and arr.rows > rows:
+                arr.truncate(rows)
+        start = min(self.codes.rows, self.scales.rows if self.scales else rows)
+        for arr in (self.codes, self.scales):
+            if arr is not None and arr.rows > start:
+                arr.truncate(start)
+        matrix = self.vectors.view()
+        for block_start in range(start, rows, self.block_rows):
+            self._append_codes(np.asarray(matrix[block_start:block_start + self.block_rows]))
+
+    def _append_codes(self, vectors: np.ndarray) -> None:
+        if self.quantization == "int8":
+            codes, scales = quantize_int8(vectors)
+            self.codes.append(codes)
+            self.scales.append(scales)
+        elif self.quantization == "binary":
+            self.codes.append(quantize_binary(vectors))
+
+    def __len__(self) -> int:
+        return self.vectors.rows
+
+    @staticmethod
+    def normalize(vectors: Any) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.clip(norms, 1e-12, None)
+
+    def append(
+        self,
+        vectors: Any,
+        commit_hashes: List[str],
+        payloads: List[Dict[str, Any]],
+    ) -> List[int]:
+        """Append rows; returns their row ids."""
+        vectors = self.normalize(vectors)
+        keys = np.array([hash_key(h) for h in commit_hashes], dtype=np.uint64)
+        lines = [json.dumps(p, ensure_ascii=False).encode() + b"\n" for p in payloads]
+        with self._lock:
+            start = len(self)
+            with open(self._payload_path, "ab") as f:
+                base = f.tell()
+                f.write(b"".join(lines))
+            offsets = base + np.cumsum([0] + [len(line) for line in lines[:-1]], dtype=np.int64)
+            # Payloads, then vectors/hashes, offsets last: a row exists once
+            # its offset is written, and _recover trims anything partial
+            self.vectors.append(vectors)
+            self._append_codes(vectors)
+            self.hashes.append(keys)
+            self.offsets.append(offsets)
+            if self.ivf is not None:
+                self.ivf.add(vectors)
+            if self._hash_set is not None:
+                self._hash_set.update(keys.tolist())
+        self._schedule_maintenance()
+        return list(range(start, start + len(payloads)))
+
+    # -- IVF maintenance ----------------------------------------------------
+
+    def _schedule_maintenance(self) -> None:
+        """Train or compact the IVF index in the background when due."""
+        ivf = self.ivf
+        if ivf is None or (self._maintenance is not None and self._maintenance.is_alive()):
+            return
+        if not ivf.trained and len(self) >= self.min_train_rows:
+            self.rebuild_index(background=True)
+        elif ivf.trained and ivf.tail_rows > self.compact_ratio * max(ivf.indexed_rows, 1):
+            self.compact_index(background=True)
+
+    def _run_maintenance(self, job: Callable[[], None], background: bool) -> None:
+        if not background:
+            job()
+            return
+        self._maintenance = threading.Thread(target=job, name="cartu-ivf", daemon=True)
+        self._maintenance.start()
+
+    def rebuild_index(self, background: bool = False) -> None:
+        """(Re)train the IVF centroids and reassign every row."""
+        if self.ivf is None:
+            raise ValueError("VectorStore was created without index='ivf'")
+        ivf = self.ivf
+
+        def job() -> None:
+            snapshot = self.vectors.view()
+            centroids, assign = ivf.fit(snapshot, nlist=self.nlist)
+            with self._lock:
+                # Rows appended while fitting
+                extra = IVFIndex.nearest(centroids, self.vectors.view()[len(snapshot):])
+                ivf.install(centroids, np.concatenate([assign, extra]))
+        self._run_maintenance(job, background)
+
+    def compact_index(self, background: bool = False) -> None:
+        """Merge rows added since the last compaction into the inverted lists."""
+        if self.ivf is None:
+            raise ValueError("VectorStore was created without index='ivf'")
+        self._run_maintenance(self.ivf.compact, background)
+
+    def wait_for_maintenance(self, timeout: Optional[float] = None) -> None:
+        if self._maintenance is not None:
+            self._maintenance.join(timeout)
+
+    def contains_many(self, commit_hashes: List[str]) -> Set[str]:
+        with self._lock:
+            if self._hash_set is None:
+                self._hash_set = set(self.hashes.view().tolist())
+            return {h for h in commit_hashes if hash_key(h) in self._hash_set}
+
+    def payloads(self, rows: List[int]) -> List[Dict[str, Any]]:
+        offsets = self.offsets.view()
+        out = []
+        with open(self._payload_path, "rb") as f:
+            for row in rows:
+                f.seek(int(offsets[row]))
+                out.append(json.loads(f.readline()))
+        return out
+
+    def _blocked_topk(
+        self,
+        score_block: Callable[[int, int], np.ndarray],
+        n_queries: int,
+        k: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-``k`` (rows, scores) per query, scoring ``block_rows`` at a time."""
+        best_rows = np.empty((n_queries, 0), dtype=np.int64)
+        best_scores = np.empty((n_queries, 0), dtype=np.float32)
+        for start in range(0, len(self), self.block_rows):
+            stop = min(start + self.block_rows, len(self))
+            scores = score_block(start, stop)                 # (q, block)
+            kk = min(k, scores.shape[1])
+            top = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+            best_rows = np.concatenate([best_rows, top + start], axis=1)
+            best_scores = np.concatenate(
+                [best_scores, np.take_along_axis(scores, top, axis=1).astype(np.float32)], axis=1,
+            )
+            if best_rows.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+        order = np.argsort(-best_scores, axis=1)
+        return (
+            np.take_along_axis(best_rows, order, axis=1),
+            np.take_along_axis(best_scores, order, axis=1),
+        )
+
+    def _approx_scorer(self, queries: np.ndarray) -> Callable[[int, int], np.ndarray]:
+        """Score a block against the quantized codes, a sub-block at a time
+        so temporaries stay small whatever ``block_rows`` is."""
+        codes = self.codes.view()
+        step = 16_384
+        if self.quantization == "int8":
+            scales = self.scales.view()
+
+            def score_rows(lo: int, hi: int) -> np.ndarray:
+                block = np.asarray(codes[lo:hi], dtype=np.float32)
+                return (queries @ block.T) * np.asarray(scales[lo:hi])
+        else:
+            query_bits = quantize_binary(queries)              # (q, bytes)
+
+            def score_rows(lo: int, hi: int) -> np.ndarray:
+                block = np.asarray(codes[lo:hi])
+                distance = np.stack([
+                    _popcount(block ^ bits).sum(axis=1, dtype=np.int32) for bits in query_bits
+                ])
+                return -distance.astype(np.float32)
+
+        def score(start: int, stop: int) -> np.ndarray:
+            out = np.empty((len(queries), stop - start), dtype=np.float32)
+            for lo in range(start, stop, step):
+                hi = min(lo + step, stop)
+                out[:, lo - start:hi - start] = score_rows(lo, hi)
+            return out
+        return score
+
+    def _score_candidates(
+        self,
+        query: np.ndarray,
+        rows: np.ndarray,
+        k: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-``k`` of the given (sorted) rows for one query."""
+        matrix = self.vectors.view()
+        if self.codes is not None and len(rows) > k * self.rescore_factor:
+            codes = np.asarray(self.codes.view()[rows])
+            if self.quantization == "int8":
+                approx = (codes.astype(np.float32) @ query) * np.asarray(self.scales.view()[rows])
+            else:
+                approx = -_popcount(codes ^ quantize_binary(query[None, :])[0]).sum(axis=1, dtype=np.int32)
+            keep = np.argpartition(-approx, k * self.rescore_factor - 1)[:k * self.rescore_factor]
+            rows = np.sort(rows[keep])
+        scores = np.asarray(matrix[rows]) @ query
+        top = np.argsort(-scores)[:k]
+        return rows[top], scores[top]
+
+    def search(
+        self,
+        queries: Any,
+        k: int,
+        exact: bool = False,
+        nprobe: Optional[int] = None,
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Top-``k`` by cosine for each query: [(rows, scores)], best first.
+        Uses the IVF index and/or the quantized prefilter + exact rescoring
+        when configured, unless ``exact`` forces a full-precision scan.
+        """
+        queries = self.normalize(queries)
+        matrix = self.vectors.view()
+        k = min(k, len(matrix))
+        if k == 0:
+            return [(np.empty(0, np.int64), np.empty(0, np.float32)) for _ in queries]
+
+        ivf = self.ivf
+        if ivf is not None and ivf.trained and not exact:
+            return [
+                self._score_candidates(query, ivf.probe(query, nprobe or self.nprobe), k)
+                for query in queries
+            ]
+
+        if self.codes is None or exact:
+            rows, scores = self._blocked_topk(
+                lambda start, stop: queries @ np.asarray(matrix[start:stop]).T,
+                len(queries), k,
+            )
+            return list(zip(rows, scores))
+
+        candidates, _ = self._blocked_topk(
+            self._approx_scorer(queries), len(queries), k * self.rescore_factor,
+        )
+        results = []
+        for query, rows in zip(queries, candidates):
+            rows = np.sort(rows)                               # sequential disk reads
+            exact_scores = np.asarray(matrix[rows]) @ query
+            top = np.argsort(-exact_scores)[:k]
+            results.append((rows[top], exact_scores[top]))
+        return results
+
+    def evaluate_recall(
+        self,
+        queries: Any,
+        k: int = 10,
+        nprobe: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Recall@k of the configured (quantized and/or IVF) search against
+        exact search, with mean latency of each, over the given query vectors.
+        """
+        t0 = time.perf_counter()
+        exact = self.search(queries, k, exact=True)
+        t1 = time.perf_counter()
+        approx = self.search(queries, k, nprobe=nprobe)
+        t2 = time.perf_counter()
+        hits = [
+            len(set(a[0].tolist()) & set(e[0].tolist())) / max(len(e[0]), 1)
+            for a, e in zip(approx, exact)
+        ]
+        n = max(len(hits), 1)
+        return {
+            "k": k,
+            "quantization": self.quantization,
+            "index": "ivf" if self.ivf is not None and self.ivf.trained else None,
+            "nprobe": (nprobe or self.nprobe) if self.ivf is not None else None,
+            "recall_at_k": sum(hits) / n,
+            "exact_ms": (t1 - t0) * 1000 / n,
+            "search_ms": (t2 - t1) * 1000 / n,
+        }
@@ -0,0 +1,227 @@
+"""
+Write-behind commit queue — lets compaction return as soon as extraction
+finishes while a background worker writes memories to the backend.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .rescue import Memory, VectorBackend
+
+
+class WriteBehindQueue:
+    """
+    Bounded in-process queue drained into a backend by a background thread.
+
+    The worker takes up to ``batch_size`` memories at a time, drops ones the
+    backend already has, and writes the rest with ``commit_many``, retrying
+    failed memories with exponential backoff before giving up on them.
+
+    When the queue is full, ``policy`` decides what happens to new work:
+      - ``"block"``: wait up to ``block_timeout`` seconds for room, then drop
+      - ``"drop_newest"``: drop the incoming memories
+      - ``"drop_oldest"``: evict the oldest queued memories to make room
+
+    ``flush()`` and ``drain()`` are the durability points.
+    """
+
+    POLICIES = ("block", "drop_newest", "drop_oldest")
+
+    def __init__(
+        self,
+        backend: VectorBackend,
+        max_size: int = 10_000,
+        batch_size: int = 64,
+        policy: str = "block",
+        block_timeout: float = 5.0,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+        dedup: bool = True,
+        on_committed: Optional[Callable[[List[Memory]], None]] = None,
+    ):
+        if policy not in self.POLICIES:
+            raise ValueError(f"policy must be one of {self.POLICIES}, got {policy!r}")
+        self.backend = backend
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.dedup = dedup
+        self.on_committed = on_committed
+
+        # (memory, enqueued_at, attempts)
+        self._queue: Deque[Tuple[Memory, float, int]] = deque()
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._stopping = False
+        self._worker: Optional[threading.Thread] = None
+
+        self.enqueued = 0
+        self.committed = 0
+        self.duplicates = 0
+        self.dropped = 0      # rejected or evicted by the full-queue policy
+        self.failed = 0       # gave up after max_retries
+        self.retries = 0
+        self._last_lag = 0.0
+
+    # -- Producer side ------------------------------------------------------
+
+    def put_many(self, memories: List[Memory]) -> List[Memory]:
+        """Enqueue memories; returns the ones accepted."""
+        accepted: List[Memory] = []
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("write-behind queue has been drained")
+            self._ensure_worker()
+            for mem in memories:
+                if len(self._queue) >= self.max_size and not self._make_room():
+                    self.dropped += 1
+                    continue
+                self._queue.append((mem, time.monotonic(), 0))
+                self.enqueued += 1
+                accepted.append(mem)
+            self._cond.notify_all()
+        return accepted
+
+    def _make_room(self) -> bool:
+        """Apply the full-queue policy. Caller holds the lock."""
+        if self.policy == "drop_oldest":
+            self._queue.popleft()
+            self.dropped += 1
+            self._cond.notify_all()
+            return True
+        if self.policy == "block":
+            deadline = time.monotonic() + self.block_timeout
+            while len(self._queue) >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+        return False
+
+    # -- Durability points --------------------------------------------------
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued so far has been written (or given up on)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Flush, then stop the worker. Further puts raise."""
+        done = self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._worker is not None:
+            self._worker.join(timeout)
+        return done
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            oldest = self._queue[0][1] if self._queue else None
+            return {
+                "depth": len(self._queue),
+                "in_flight": self._in_flight,
+                "lag_s": time.monotonic() - oldest if oldest is not None else 0.0,
+                "last_commit_lag_s": self._last_lag,
+                "enqueued": self.enqueued,
+                "committed": self.committed,
+                "duplicates": self.duplicates,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "retries": self.retries,
+                "policy": self.policy,
+            }
+
+    # -- Worker -------------------------------------------------------------
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._run, name="cartu-write-behind", daemon=True,
+            )
+            self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopping:
+                    self._cond.wait()
+                if not self._queue:
+                    return  # stopping and empty
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                self._in_flight = len(batch)
+                self._cond.notify_all()  # room for blocked producers
+
+            retry = self._write(batch)
+
+            with self._cond:
+                self._in_flight = 0
+                if retry:
+                    # Back off before the retry; stays at the head of the queue
+                    self._queue.extendleft(reversed(retry))
+                    attempts = retry[0][2]
+                    self._cond.wait(self.retry_backoff * 2 ** (attempts - 1))
+                self._cond.notify_all()
+
+    def _deduplicate_many(self, commit_hashes: List[str]) -> set:
+        """Batched existence check; per-hash checks for backends without one."""
+        if hasattr(self.backend, "deduplicate_many"):
+            return self.backend.deduplicate_many(commit_hashes)
+        return {h for h in commit_hashes if self.backend.deduplicate(h)}
+
+    def _commit_many(self, memories: List[Memory]) -> List[bool]:
+        if hasattr(self.backend, "commit_many"):
+            return self.backend.commit_many(memories)
+        results = []
+        for mem in memories:
+            try:
+                results.append(bool(self.backend.commit(mem)))
+            except Exception:
+                results.append(False)  # retried like a failed batch entry
+        return results
+
+    def _write(self, batch: List[Tuple[Memory, float, int]]) -> List[Tuple[Memory, float, int]]:
+        """Write one batch; returns the entries to retry."""
+        memories = [mem for mem, _, _ in batch]
+        try:
+            if self.dedup:
+                exists = self._deduplicate_many([m.commit_hash for m in memories])
+                fresh = [entry for entry in batch if entry[0].commit_hash not in exists]
+                self.duplicates += len(batch) - len(fresh)
+                batch = fresh
+            results = self._commit_many([mem for mem, _, _ in batch]) if batch else []
+        except Exception:
+            results = [False] * len(batch)
+
+        written: List[Memory] = []
+        retry: List[Tuple[Memory, float, int]] = []
+        now = time.monotonic()
+        for (mem, enqueued_at, attempts), ok in zip(batch, results):
+            if ok:
+                written.append(mem)
+                self._last_lag = now - enqueued_at
+            elif attempts + 1 < self.max_retries:
+                retry.append((mem, enqueued_at, attempts + 1))
+            else:
+                self.failed += 1
+        self.committed += len(written)
+        self.retries += len(retry)
+
+        if written and self.on_committed is not None:
+            try:
+                self.on_committed(written)
+            except Exception:
+                pass
+        return retry
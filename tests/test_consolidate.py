@@ -0,0 +1,96 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from cartu_method.consolidate import Consolidator  # noqa: E402
+from cartu_method.rescue import Memory  # noqa: E402
+
+
+class StubBackend:
+    """In-memory collection: point id -> (vector, memory)."""
+
+    def __init__(self, vectors, importances):
+        self.points = {
+            i: (list(v), Memory(text=f"m{i}", category="fact", importance=imp))
+            for i, (v, imp) in enumerate(zip(vectors, importances))
+        }
+
+    def scroll(self, offset=None, limit=256):
+        ids = sorted(i for i in self.points if offset is None or i >= offset)
+        page = ids[:limit]
+        records = [(i, *self.points[i]) for i in page]
+        return records, ids[limit] if len(ids) > limit else None
+
+    def delete_many(self, point_ids, commit_hashes=None):
+        for i in point_ids:
+            self.points.pop(i, None)
+        return len(point_ids)
+
+    def fetch_vectors(self, commit_hashes):
+        by_hash = {m.commit_hash: v for v, m in self.points.values()}
+        return {h: by_hash[h] for h in commit_hashes if h in by_hash}
+
+    def nearest_many(self, vectors, k=3, threshold=None):
+        stored = list(self.points.values())
+        matrix = np.array([v for v, _ in stored], dtype=np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        out = []
+        for vector in vectors:
+            query = np.asarray(vector, dtype=np.float32)
+            scores = matrix @ (query / np.linalg.norm(query))
+            top = np.argsort(-scores)[:k]
+            out.append([
+                (float(scores[t]), stored[t][1]) for t in top
+                if threshold is None or scores[t] >= threshold
+            ])
+        return out
+
+    def texts(self):
+        return sorted(m.text for _, m in self.points.values())
+
+
+def angle(theta):
+    return [math.cos(theta), math.sin(theta), 0.0]
+
+
+@pytest.mark.parametrize("page_size", [1, 3])
+def test_chain_keeps_both_ends(page_size):
+    # m0 ~ m1 and m1 ~ m2, but m0 and m2 are not near; m2 ranks highest
+    backend = StubBackend([angle(0), angle(0.37), angle(0.74)], [5, 6, 7])
+    consolidator = Consolidator(backend, threshold=0.92, page_size=page_size)
+    consolidator.block_size = page_size
+    report = consolidator.run()
+    assert backend.texts() == ["m0", "m2"]
+    assert report["deleted"] == 1 and report["done"]
+
+
+@pytest.mark.parametrize("page_size", [1, 4])
+def test_keeps_the_highest_ranked_duplicate(page_size):
+    backend = StubBackend([angle(0), angle(0.01), angle(0.02), angle(1.5)], [5, 9, 7, 5])
+    consolidator = Consolidator(backend, threshold=0.92, page_size=page_size)
+    consolidator.block_size = page_size
+    consolidator.run()
+    assert backend.texts() == ["m1", "m3"]
+
+
+def test_dry_run_deletes_nothing():
+    backend = StubBackend([angle(0), angle(0.01)], [5, 9])
+    report = Consolidator(backend, threshold=0.92, dry_run=True).run()
+    assert report["deleted"] == 1
+    assert backend.texts() == ["m0", "m1"]
+
+
+def test_checkpoint_resumes(tmp_path):
+    vectors = [angle(i * 0.3) for i in range(6)]
+    backend = StubBackend(vectors, [5] * 6)
+    path = str(tmp_path / "consolidate.json")
+    consolidator = Consolidator(backend, threshold=0.999, checkpoint_path=path)
+    consolidator.block_size = 2
+    assert not consolidator.run(max_blocks=1)["done"]
+
+    resumed = Consolidator(backend, threshold=0.999, checkpoint_path=path)
+    resumed.block_size = 2
+    report = resumed.run()
+    assert report["done"] and report["scanned"] == 6
@@ -0,0 +1,81 @@
+import pytest
+
+from cartu_method.rescue import Memory, MemoryRescue
+
+
+class StubBackend:
+    def __init__(self):
+        self.store = {}
+        self.failing = False
+
+    def commit(self, memory):
+        if self.failing:
+            return False
+        self.store[memory.commit_hash] = memory
+        return True
+
+    def search(self, query, limit=5, filter=None):
+        return list(self.store.values())[:limit]
+
+    def deduplicate(self, commit_hash):
+        return commit_hash in self.store
+
+
+class StubExtractor:
+    """Extracts one memory per block of the context it is sent."""
+
+    def __init__(self):
+        self.contexts = []
+        self.failing = False
+
+    def _memories(self, context):
+        self.contexts.append(context)
+        if self.failing:
+            raise RuntimeError("extraction failed")
+        return [
+            Memory(text=block, category="fact", importance=9)
+            for block in context.split("\n\n")
+        ]
+
+    async def extract(self, context, client=None):
+        return self._memories(context)
+
+    async def stream(self, context, client=None):
+        for memory in self._memories(context):
+            yield memory
+
+
+@pytest.fixture(params=[False, True], ids=["batch", "stream"])
+def engine(request):
+    rescue = MemoryRescue(backend=StubBackend(), incremental=True, session_id="s", stream=request.param)
+    rescue.extractors = [StubExtractor()]
+    yield rescue
+    rescue.close()
+
+
+def test_rescued_blocks_are_not_sent_again(engine):
+    extractor = engine.extractors[0]
+    assert len(engine.extract_and_commit("alpha\n\nbeta")) == 2
+    assert engine.extract_and_commit("alpha\n\nbeta") == []
+    assert len(extractor.contexts) == 1
+
+    engine.extract_and_commit("alpha\n\nbeta\n\ngamma")
+    assert "gamma" in extractor.contexts[-1]
+
+
+def test_failed_extraction_is_sent_again(engine):
+    extractor = engine.extractors[0]
+    extractor.failing = True
+    assert engine.extract_and_commit("alpha") == []
+
+    extractor.failing = False
+    assert [m.text for m in engine.extract_and_commit("alpha")] == ["alpha"]
+
+
+def test_failed_commit_is_sent_again(engine):
+    engine.backend.failing = True
+    assert engine.extract_and_commit("alpha") == []
+
+    engine.backend.failing = False
+    assert [m.text for m in engine.extract_and_commit("alpha")] == ["alpha"]
+    assert "alpha" in [m.text for m in engine.backend.store.values()]
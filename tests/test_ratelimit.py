@@ -0,0 +1,52 @@
+import httpx
+import pytest
+
+from cartu_method.ratelimit import RateLimiter, configure_rate_limit, rate_limiter, retry_after
+
+
+def test_reservations_queue_once_the_bucket_is_empty():
+    limiter = RateLimiter(requests_per_minute=60)
+    for _ in range(60):
+        assert limiter.reserve() == 0
+    # One request a second: the next two wait about one and two seconds
+    assert limiter.reserve() == pytest.approx(1.0, abs=0.05)
+    assert limiter.reserve() == pytest.approx(2.0, abs=0.05)
+    assert limiter.stats()["delayed"] == 2
+
+
+def test_settle_refunds_the_over_estimate():
+    limiter = RateLimiter(tokens_per_minute=1000)
+    limiter.reserve(800)
+    limiter.settle(800, 200)
+    assert limiter.reserve(700) == 0
+
+
+def test_configure_keeps_limits_not_passed():
+    limiter = RateLimiter(requests_per_minute=30)
+    limiter.reserve()
+    limiter.configure(tokens_per_minute=1000)
+    assert limiter.requests_per_minute == 30
+    assert limiter.tokens_per_minute == 1000
+    # The reservation made before reconfiguring still counts
+    assert limiter._requests.level == pytest.approx(29, abs=0.1)
+
+
+def test_configure_rate_limit_is_shared_per_provider_and_key():
+    first = configure_rate_limit("test-provider", "key-1", requests_per_minute=30)
+    again = configure_rate_limit("test-provider", "key-1", tokens_per_minute=500)
+    assert first is again is rate_limiter("test-provider", "key-1")
+    assert first.requests_per_minute == 30
+    assert rate_limiter("test-provider", "key-2") is not first
+    assert "key-1" not in first.name
+
+
+def test_throttle_blocks_every_caller():
+    limiter = RateLimiter(jitter=0)
+    limiter.throttle(5)
+    assert limiter.reserve() == pytest.approx(5, abs=0.05)
+
+
+def test_retry_after_headers():
+    assert retry_after(httpx.Response(429, headers={"retry-after": "3"}), 0) == 3
+    assert retry_after(httpx.Response(429, headers={"retry-after-ms": "1500"}), 0) == 1.5
+    assert retry_after(httpx.Response(429), 2) == 4
@@ -0,0 +1,75 @@
+from cartu_method.extractors import JSONArrayStreamParser, KeyedArrayStreamParser
+
+
+def feed(parser, text, step):
+    items = []
+    for start in range(0, len(text), step):
+        items.extend(parser.feed(text[start:start + step]))
+    return items
+
+
+def test_array_parser_yields_elements_across_chunk_boundaries():
+    text = '```json\n[{"text": "a"}, {"text": "b [x] {y}"}]\n```'
+    for step in (1, 3, len(text)):
+        parser = JSONArrayStreamParser()
+        assert [i["text"] for i in feed(parser, text, step)] == ["a", "b [x] {y}"]
+        assert parser.done and not parser.truncated
+
+
+def test_array_parser_skips_brackets_in_prose():
+    parser = JSONArrayStreamParser()
+    items = feed(parser, 'Facts [below]:\n[ {"text": "a"} ]', 2)
+    assert [i["text"] for i in items] == ["a"]
+    assert parser.done
+
+
+def test_array_parser_flags_truncation():
+    parser = JSONArrayStreamParser()
+    assert [i["text"] for i in parser.feed('[{"text": "a"}, {"te')] == ["a"]
+    assert parser.truncated
+
+    parser = JSONArrayStreamParser()
+    parser.feed("no array [here]")
+    assert not parser.truncated and not parser.done
+
+
+def test_array_parser_skips_malformed_elements():
+    parser = JSONArrayStreamParser()
+    assert parser.feed('[{"text": "a",}, {"text": "b"}]') == [{"text": "b"}]
+
+
+def test_keyed_parser_reads_every_array():
+    text = '{"facts": [{"text": "f"}], "decisions": [{"text": "d"}], "skills": []}'
+    for step in (1, 4, len(text)):
+        parser = KeyedArrayStreamParser()
+        items = feed(parser, text, step)
+        assert [(k, i["text"]) for k, i in items] == [("facts", "f"), ("decisions", "d")]
+        assert parser.done and not parser.truncated
+
+
+def test_keyed_parser_skips_nested_values():
+    text = (
+        '{"meta": {"n": 1, "s": "}"}, "facts": [{"text": "f"}], "note": "a, b}",'
+        ' "tags": ["q]"], "decisions": [{"text": "d"}]}'
+    )
+    parser = KeyedArrayStreamParser()
+    items = feed(parser, text, 3)
+    assert [(k, i["text"]) for k, i in items] == [("facts", "f"), ("decisions", "d")]
+    assert parser.done
+
+
+def test_keyed_parser_skips_braces_in_prose():
+    parser = KeyedArrayStreamParser()
+    items = feed(parser, 'Sure {here} it is: {"facts": [{"text": "f"}]}', 2)
+    assert [(k, i["text"]) for k, i in items] == [("facts", "f")]
+    assert parser.done
+
+
+def test_keyed_parser_flags_truncation():
+    parser = KeyedArrayStreamParser()
+    parser.feed('{"meta": {"n": 1}, "facts": [{"text": "f"}], "decisions": [{"te')
+    assert parser.truncated
+
+    parser = KeyedArrayStreamParser()
+    parser.feed("no {json} here")
+    assert not parser.truncated and not parser.done